@@ -0,0 +1,235 @@
+"""Upstream responses for the benchmarks, replayed without any network access.
+
+Recorded copies in benchmarks/fixtures/ are used when present (see `record`),
+otherwise deterministic synthetic data in the same formats is generated.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+URLS = {
+    "coinmarketcap.html": "https://coinmarketcap.com",
+    "sp500.html": "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies",
+    "co2_annmean_gl.txt": "https://www.esrl.noaa.gov/gmd/webdata/ccgg/trends/co2/co2_annmean_gl.txt",
+    "gmsl_seasons_retained.txt": "https://sealevel.colorado.edu/files/2020_rel1:%20Global%20Mean%20Sea%20Level%20"
+    "(Seasonal%20Signals%20Retained)/gmsl_2020rel1_seasons_retained.txt",
+    "GLB.Ts+dSST.txt": "https://data.giss.nasa.gov/gistemp/tabledata_v4/GLB.Ts+dSST.txt",
+}
+
+SECTORS = [
+    "Communication Services",
+    "Consumer Discretionary",
+    "Consumer Staples",
+    "Energy",
+    "Financials",
+    "Health Care",
+    "Industrials",
+    "Information Technology",
+    "Materials",
+    "Real Estate",
+    "Utilities",
+]
+
+
+def _recorded(name):
+    path = os.path.join(FIXTURES_DIR, name)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def coinmarketcap_page(coins=100):
+    recorded = _recorded("coinmarketcap.html")
+    if recorded is not None:
+        return recorded
+
+    rng = np.random.default_rng(0)
+    listings = []
+    for i in range(coins):
+        quote = {}
+        for currency, scale in (("USD", 1.0), ("btc", 1 / 60000), ("eth", 1 / 4000)):
+            price = float(rng.lognormal(2, 3)) * scale
+            quote[currency] = {
+                "price": price,
+                "volume24h": price * float(rng.lognormal(14, 2)),
+                "marketCap": price * float(rng.lognormal(18, 2)),
+                "percentChange1h": float(rng.normal(0, 1)),
+                "percentChange24h": float(rng.normal(0, 4)),
+                "percentChange7d": float(rng.normal(0, 10)),
+            }
+        listings.append(
+            {"id": i, "slug": f"coin-{i}", "symbol": f"C{i:03d}", "quote": quote}
+        )
+    payload = {
+        "props": {
+            "initialState": {"cryptocurrency": {"listingLatest": {"data": listings}}}
+        }
+    }
+    body = '<div id="__next">' + "<div><span>filler</span></div>" * 5000 + "</div>"
+    return (
+        f"<html><head><title>CoinMarketCap</title></head><body>{body}"
+        '<script id="__NEXT_DATA__" type="application/json">'
+        f"{json.dumps(payload)}</script></body></html>"
+    ).encode()
+
+
+def coinmarketcap_listing(start=1, limit=1000, total=5000):
+    """A page of CoinMarketCap's listing API, `limit` coins from rank `start`."""
+    listings = []
+    for rank in range(start, min(start + limit, total + 1)):
+        rng = np.random.default_rng(rank)
+        # Market caps fall with the rank, as the API sorts by them:
+        market_cap = 1e12 / rank
+        quotes = []
+        for currency, scale in (("USD", 1.0), ("BTC", 1 / 60000), ("ETH", 1 / 4000)):
+            price = float(rng.lognormal(0, 3)) * scale
+            quotes.append(
+                {
+                    "name": currency,
+                    "price": price,
+                    "volume24h": market_cap * scale * float(rng.uniform(0.01, 0.2)),
+                    "marketCap": market_cap * scale,
+                    "percentChange1h": float(rng.normal(0, 1)),
+                    "percentChange24h": float(rng.normal(0, 4)),
+                    "percentChange7d": float(rng.normal(0, 10)),
+                }
+            )
+        # Symbols repeat across coins, as they do on CoinMarketCap:
+        symbol = "".join(chr(65 + int(c)) for c in rng.integers(0, 26, 1 + rank % 4))
+        listings.append(
+            {
+                "id": rank,
+                "name": f"Coin {rank}",
+                "slug": f"coin-{rank}",
+                "symbol": symbol,
+                "cmcRank": rank,
+                "quotes": quotes,
+            }
+        )
+    payload = {"data": {"cryptoCurrencyList": listings, "totalCount": str(total)}}
+    return json.dumps(payload).encode()
+
+
+def sp500_page(companies=505):
+    recorded = _recorded("sp500.html")
+    if recorded is not None:
+        return recorded.decode()
+
+    rng = np.random.default_rng(0)
+    sectors = rng.choice(SECTORS, companies)
+    df = pd.DataFrame(
+        {
+            "Symbol": [f"S{i:03d}" for i in range(companies)],
+            "Security": [f"Company {i}" for i in range(companies)],
+            "SEC filings": "reports",
+            "GICS Sector": sectors,
+            "GICS Sub-Industry": [f"{s} {rng.integers(8)}" for s in sectors],
+            "Headquarters Location": "New York, New York",
+            "Date first added": "1976-08-09",
+            "CIK": rng.integers(1000, 2000000, companies),
+            "Founded": "1902",
+        }
+    )
+    second_table = pd.DataFrame({"Date": ["2021-01-01"], "Added": ["S000"]})
+    return df.to_html(index=False, table_id="constituents") + second_table.to_html(
+        index=False
+    )
+
+
+def co2_text():
+    recorded = _recorded("co2_annmean_gl.txt")
+    if recorded is not None:
+        return recorded.decode()
+
+    lines = [f"# comment line {i}" for i in range(57)]
+    lines += [
+        f"  {year}   {338.9 + 1.8 * (year - 1980):.2f}     0.10"
+        for year in range(1980, 2021)
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def sea_level_text():
+    recorded = _recorded("gmsl_seasons_retained.txt")
+    if recorded is not None:
+        return recorded.decode()
+
+    rng = np.random.default_rng(0)
+    times = np.arange(1993.0, 2021.0, 1 / 36.5)
+    levels = (times - 2007) * 3.3 + rng.normal(0, 3, len(times))
+    lines = ["year  gmsl (mm)"]
+    lines += [f"{t:.4f}  {mm:8.2f}" for t, mm in zip(times, levels)]
+    return "\n".join(lines) + "\n"
+
+
+def giss_text():
+    recorded = _recorded("GLB.Ts+dSST.txt")
+    if recorded is not None:
+        return recorded.decode()
+
+    rng = np.random.default_rng(0)
+    header = (
+        "Year   Jan  Feb  Mar  Apr  May  Jun  Jul  Aug  Sep  Oct  Nov  Dec"
+        "    J-D D-N    DJF  MAM  JJA  SON  Year"
+    )
+    lines = [
+        "        GLOBAL Land-Ocean Temperature Index in 0.01 degrees Celsius"
+        "   base period: 1951-1980",
+        "",
+    ] + [""] * 6
+    for year in range(1880, 2021):
+        if (year - 1880) % 20 == 0:
+            lines += ["", header]
+        months = (rng.normal(0, 15, 12) + (year - 1950) * 0.8).round().astype(int)
+        seasons = " ".join(f"{v:4d}" for v in months[:4])
+        monthly = " ".join(f"{v:4d}" for v in months)
+        lines.append(
+            f"{year}  {monthly}   {int(months.mean()):4d} {int(months.mean()):4d}"
+            f"   {seasons}  {year}"
+        )
+    lines += ["", header, "Divide by 100 to get changes in degrees Celsius (deg-C)."]
+    lines += ["footnote"] * 6
+    return "\n".join(lines) + "\n"
+
+
+def ohlcv(years=5, seed=0):
+    """Synthetic daily OHLCV frame shaped like yfinance's history()."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2016-01-04", periods=252 * years, name="Date")
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(index))))
+    open_ = close * (1 + rng.normal(0, 0.005, len(index)))
+    return pd.DataFrame(
+        {
+            "Open": open_,
+            "High": np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, len(index))),
+            "Low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, len(index))),
+            "Close": close,
+            "Volume": rng.integers(1_000_000, 10_000_000, len(index)),
+        },
+        index=index,
+    )
+
+
+def record():
+    """Save the live upstream responses, so later runs replay real data."""
+    from common.fetch import fetch  # pylint: disable=import-outside-toplevel
+
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for name, url in URLS.items():
+        content = fetch(url)
+        with open(os.path.join(FIXTURES_DIR, name), "wb") as f:
+            f.write(content)
+        print(f"Recorded {name} ({len(content)} bytes)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=record.__doc__)
+    parser.add_argument("--record", action="store_true", required=True)
+    parser.parse_args()
+    record()
@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+
+from benchmarks import fixtures
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def _benchmarks():
+    """Benchmark name -> zero-argument callable, with its inputs prepared up front."""
+    # pylint: disable=import-outside-toplevel
+    import common.render
+    from climate.app import scatter_png
+    from climate.ingest import parse_co2, parse_ocean_temp, parse_sea_level
+    from climate.trends import combine
+    from crypto.app import change_png, parse_snapshot
+    from crypto.listings import (
+        index_symbols,
+        listings_frame,
+        parse_page,
+        search_symbols,
+    )
+    from stocks.analytics import close_matrix, covariance_correlation, daily_returns
+    from stocks.app import (
+        index_constituents,
+        parse_constituents,
+        run_cerebro_backtest,
+        sector_options,
+        select_constituents,
+        sub_sector_options,
+    )
+    from stocks.backtest import run_sma_backtest
+    from stocks.indicators import moving_averages
+
+    page = fixtures.coinmarketcap_page()
+    co2, sea_level, giss = (
+        fixtures.co2_text(),
+        fixtures.sea_level_text(),
+        fixtures.giss_text(),
+    )
+    sp500_html = fixtures.sp500_page()
+    constituents = parse_constituents(sp500_html)
+    prices = fixtures.ohlcv(years=5)
+    returns = daily_returns(
+        close_matrix({i: fixtures.ohlcv(years=2, seed=i) for i in range(500)})
+    )
+
+    index = index_constituents(constituents)
+    sectors = sector_options(index)[:3]
+    co2_df = parse_co2(co2).reset_index()
+    snapshot = parse_snapshot(page)
+    listings = [
+        coin
+        for start in range(1, 10001, 1000)
+        for coin in parse_page(fixtures.coinmarketcap_listing(start, 1000, 10000))[0]
+    ]
+    universe = listings_frame(listings)
+    symbols = index_symbols(universe)
+    change = snapshot.rename(columns=lambda c: c.replace(" [USD]", ""))[:10]
+    change = change.assign(positive_percent_change_7d=change["7 days change (%)"] > 0)
+
+    def uncached(render):
+        def run():
+            common.render._images.clear()  # pylint: disable=protected-access
+            return render()
+
+        return run
+
+    return {
+        "crypto.parse_snapshot": lambda: parse_snapshot(page),
+        "crypto.listings_frame": lambda: listings_frame(listings),
+        "crypto.search_symbols": lambda: search_symbols(symbols, "ab", 500),
+        "climate.parse_co2": lambda: parse_co2(co2),
+        "climate.parse_sea_level": lambda: parse_sea_level(sea_level),
+        "climate.parse_ocean_temp": lambda: parse_ocean_temp(giss),
+        "climate.combine": lambda: combine(
+            parse_co2(co2), parse_sea_level(sea_level), parse_ocean_temp(giss)
+        ),
+        "stocks.parse_constituents": lambda: parse_constituents(sp500_html),
+        "stocks.sector_filter": lambda: select_constituents(
+            constituents, index, sectors, sub_sector_options(index, sectors)
+        ),
+        "stocks.sector_correlation": lambda: covariance_correlation(returns),
+        "stocks.moving_averages": lambda: moving_averages(
+            # A new key every call, so the indicators are computed from scratch:
+            object(),
+            prices,
+        ),
+        "stocks.backtest_vectorized": lambda: run_sma_backtest(prices),
+        "stocks.backtest_cerebro": lambda: run_cerebro_backtest(prices),
+        "render.climate_scatter": uncached(lambda: scatter_png(co2_df, "co2", "CO2")),
+        "render.crypto_change": uncached(lambda: change_png(change, "7 days")),
+    }
+
+
+def measure(func, repeat):
+    """Median and minimum milliseconds per call over `repeat` rounds of at least 0.2 s."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = [t / number * 1000 for t in timer.repeat(repeat=repeat, number=number)]
+    return {"median_ms": statistics.median(times), "min_ms": min(times)}
+
+
+def compare(results, baseline, tolerance):
+    """Names of the benchmarks whose median is slower than the baseline allows."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference and result["median_ms"] > reference["median_ms"] * (1 + tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time the hot paths of every demo offline."
+    )
+    parser.add_argument(
+        "-k", "--filter", default="", help="only run names containing this"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown over the baseline median, as a fraction",
+    )
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, func in _benchmarks().items():
+        if args.filter in name:
+            results[name] = measure(func, args.repeat)
+            print(f"{name:32s} {results[name]['median_ms']:10.3f} ms")
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline to store one.")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    for name in regressions:
+        print(
+            f"REGRESSION: {name} is more than {args.tolerance:.0%} slower than the baseline"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
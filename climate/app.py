@@ -1,156 +1,181 @@
-import base64
-import math
-import ssl
 from datetime import datetime
 
-import matplotlib.pyplot as plt
 import pandas as pd
 import streamlit as st
 
-ssl._create_default_https_context = ssl._create_unverified_context
+from climate.ingest import parse_co2, parse_ocean_temp, parse_sea_level
+from climate.trends import MEASURES, WINDOW, bounds, columns, combine, slope, years
+from common import downsample
+from common.diskcache import disk_cache
+from common.export import download_widget
+from common.fetch import fetch
+from common.render import frame_digest, render
+from common.timing import span
 
 
-def filedownload(df, data_type):
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()  # strings <-> bytes conversions
-    href = f'<a href="data:file/csv;base64,{b64}" '
-    href += f'download="Climate_{data_type}_{datetime.now().strftime("%Y-%m-%d")}.csv">'
-    href += "📥 Download data as CSV File</a>"
-    return href
+def fetch_text(url):
+    # These files change a few times a year, so an unchanged one is not downloaded again:
+    return fetch(url, revalidate=True).decode()
 
 
-@st.cache
+@disk_cache(ttl=24 * 60 * 60)
 def load_co2_data():
     # Globally averaged atmospheric CO2 on marine surface - annual mean data:
     url_co2_annmean_gl = (
         "https://www.esrl.noaa.gov/gmd/webdata/ccgg/trends/co2/co2_annmean_gl.txt"
     )
-
-    co2_annmean_gl = pd.read_csv(
-        url_co2_annmean_gl,
-        delim_whitespace=True,
-        skiprows=57,
-        usecols=[0, 1],
-        names=["year", "co2"],
-    )
-    return co2_annmean_gl
+    text = fetch_text(url_co2_annmean_gl)
+    with span("parse"):
+        return parse_co2(text)
 
 
-@st.cache
+@disk_cache(ttl=24 * 60 * 60)
 def load_sea_level_data():
     # Global mean sea level:
     url_sea_levels = "https://sealevel.colorado.edu/files/2020_rel1:%20Global%20Mean%20Sea%20Level%20"
     url_sea_levels += (
         "(Seasonal%20Signals%20Retained)/gmsl_2020rel1_seasons_retained.txt"
     )
+    text = fetch_text(url_sea_levels)
+    with span("parse"):
+        return parse_sea_level(text)
 
-    sea_level_gl = pd.read_csv(
-        url_sea_levels, delim_whitespace=True, skiprows=1, names=["year", "mm"]
-    )
-
-    sea_level_gl["year"] = sea_level_gl.apply(lambda x: math.floor(x["year"]), axis=1)
-
-    mean_sea_level_gl = sea_level_gl.groupby("year", as_index=False).mean()
 
-    return mean_sea_level_gl
-
-
-@st.cache
+@disk_cache(ttl=24 * 60 * 60)
 def load_ocean_temp_data():
     # Global land-ocean temperature change in 0.01 degrees Celsius with respect to Jan 1950:
     url_ocean_temp_gl = (
         "https://data.giss.nasa.gov/gistemp/tabledata_v4/GLB.Ts+dSST.txt"
     )
-
-    ocean_temp_gl = pd.read_csv(
-        url_ocean_temp_gl,
-        delim_whitespace=True,
-        skiprows=list(range(8))
-        + [29, 30, 51, 52, 73, 74, 95, 96, 117, 118, 139, 140, 161, 162],
-        skipfooter=8,
-        usecols=[0, 13],
-        engine="python",
-        names=["year", "temp"],
-    )
-
-    ocean_temp_gl["temp"] = ocean_temp_gl.apply(lambda x: x["temp"] / 100, axis=1)
-
-    return ocean_temp_gl
-
-
-def climate_co2():
+    text = fetch_text(url_ocean_temp_gl)
+    with span("parse"):
+        return parse_ocean_temp(text)
+
+
+@disk_cache(ttl=24 * 60 * 60)
+def load_climate_data():
+    # Every page reads this table; rolling means, trends and anomalies are computed once per refresh:
+    with span("combine"):
+        return combine(load_co2_data(), load_sea_level_data(), load_ocean_temp_data())
+
+
+def warm(refresh=False):
+    """Load the climate table, downloading changed files when refreshing, and plot every full range."""
+    if refresh:
+        load_co2_data.refresh()
+        load_sea_level_data.refresh()
+        load_ocean_temp_data.refresh()
+        df = load_climate_data.refresh()
+    else:
+        df = load_climate_data()
+    for measure, label in MEASURES.items():
+        scatter_png(years(df, *bounds(df, measure))[columns(measure)], measure, label)
+
+
+def scatter_png(df, y, ylabel):
+    lines = [c for c in (f"{y}_mean", f"{y}_trend") if c in df]
+    df = downsample.lines(df[[y] + lines])
+
+    def draw(ax):
+        ax.scatter(df.index, df[y])
+        for column, label in zip(lines, (f"{WINDOW}-year mean", "Linear trend")):
+            ax.plot(df.index, df[column], label=label)
+        if lines:
+            ax.legend()
+        ax.set_ylabel(ylabel)
+        ax.set_xlabel("Year")
+        ax.grid()
+
+    return render(("climate", y, frame_digest(df)), draw)
+
+
+def climate_measure(measure, export_name):
+    df = load_climate_data()
+    first, last = bounds(df, measure)
     time_interval = st.sidebar.slider(
-        "Select a range of years to display:", 1980, 2020, (1980, 2020)
+        "Select a range of years to display:", first, last, (first, last)
     )
 
-    col1, col2 = st.beta_columns((1, 2))
-
-    df = load_co2_data()
+    col1, col2 = st.columns((1, 2))
 
-    df_filtered = df.iloc[time_interval[0] - 1980 : time_interval[1] - 1980 + 1]
+    # A slice of the shared, read-only dataset: a view, not a per-session copy.
+    df_filtered = years(df, *time_interval)[columns(measure)].dropna(subset=[measure])
 
     col1.dataframe(
         df_filtered,
         height=df_filtered.shape[0] * 30,
     )
 
-    plt.figure()
-    df_filtered.plot.scatter(x="year", y="co2")
-    plt.ylabel("CO2 concentration (ppm)")
-    plt.xlabel("Year")
-    plt.grid()
-    col2.pyplot(plt)
-
-    st.markdown(filedownload(df_filtered, "CO2"), unsafe_allow_html=True)
-
+    col2.image(
+        scatter_png(df_filtered, measure, MEASURES[measure]),
+        use_column_width=True,
+    )
+    col2.caption(
+        f"Linear trend over {first}-{last}: {slope(df, measure):+.3g} per year."
+    )
 
-def climate_sea_level():
-    time_interval = st.sidebar.slider(
-        "Select a range of years to display:", 1992, 2020, (1992, 2020)
+    download_widget(
+        st, df_filtered, f"{export_name}_{datetime.now().strftime('%Y-%m-%d')}"
     )
 
-    col1, col2 = st.beta_columns((1, 2))
 
-    df = load_sea_level_data()
+def climate_co2():
+    climate_measure("co2", "Climate_CO2")
 
-    df_filtered = df.iloc[time_interval[0] - 1992 : time_interval[1] - 1992 + 1]
 
-    col1.dataframe(
-        df_filtered,
-        height=df.shape[0] * 100,
-    )
+def climate_sea_level():
+    climate_measure("mm", "Climate_sea_level")
 
-    plt.figure(figsize=(5, 1))
-    df_filtered.plot.scatter(x="year", y="mm")
-    plt.ylabel("Relative sea level (mm)")
-    plt.xlabel("Year")
-    plt.grid()
-    col2.pyplot(plt)
 
-    st.markdown(filedownload(df_filtered, "sea_level"), unsafe_allow_html=True)
+def climate_ocean_temp():
+    climate_measure("temp", "Climate_ocean_temp")
 
 
-def climate_ocean_temp():
+def climate_comparison():
+    df = load_climate_data()
+    measures = st.sidebar.multiselect(
+        "Measures to compare:",
+        list(MEASURES),
+        list(MEASURES),
+        format_func=MEASURES.get,
+    )
+    if not measures:
+        st.write("Select at least one measure.")
+        return
+
+    # The years every selected measure covers:
+    first = max(bounds(df, m)[0] for m in measures)
+    last = min(bounds(df, m)[1] for m in measures)
+    if first > last:
+        st.write("The selected measures do not overlap.")
+        return
     time_interval = st.sidebar.slider(
-        "Select a range of years to display:", 1880, 2020, (1880, 2020)
+        "Select a range of years to display:", first, last, (first, last)
     )
+    view = st.sidebar.radio("Show:", ("Values", f"{WINDOW}-year means", "Anomalies"))
+    suffix = {"Values": "", "Anomalies": "_anomaly"}.get(view, "_mean")
 
-    col1, col2 = st.beta_columns((1, 2))
+    df_filtered = years(df, *time_interval)
+    selected = df_filtered[[m + suffix for m in measures]]
+    # Standardized over the selected years, so different units share one axis:
+    standardized = (selected - selected.mean()) / selected.std()
+    standardized.columns = [MEASURES[m] for m in measures]
 
-    df = load_ocean_temp_data()
-
-    df_filtered = df.iloc[time_interval[0] - 1880 : time_interval[1] - 1880 + 1]
+    st.line_chart(downsample.lines(standardized))
+    st.caption("Standard deviations from the mean of the selected years.")
 
+    col1, col2 = st.columns(2)
+    col1.write("Linear trend, per year:")
     col1.dataframe(
-        df_filtered,
-        height=df.shape[0] * 100,
+        pd.Series(
+            {MEASURES[m]: slope(df, m) for m in measures}, name="Trend"
+        ).to_frame()
     )
+    col2.write(f"Correlation of the {view.lower()}:")
+    col2.dataframe(standardized.corr())
 
-    plt.figure(figsize=(5, 1))
-    df_filtered.plot.scatter(x="year", y="temp")
-    plt.ylabel("Relative temperature (°C)")
-    plt.xlabel("Year")
-    plt.grid()
-    col2.pyplot(plt)
-
-    st.markdown(filedownload(df_filtered, "ocean_temp"), unsafe_allow_html=True)
+    download_widget(
+        st,
+        df_filtered[[c for m in measures for c in columns(m)]],
+        f"Climate_comparison_{datetime.now().strftime('%Y-%m-%d')}",
+    )
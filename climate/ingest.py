@@ -0,0 +1,42 @@
+import io
+import re
+
+import numpy as np
+import pandas as pd
+
+# Data rows start with a number (the year); comments, headers, repeated headers and footnotes don't:
+data_row_pattern = re.compile(r"^[ \t]*\d+(?:\.\d+)?[ \t].*$", re.MULTILINE)
+
+
+def _data_rows(text, names, usecols, **kwargs):
+    """Parse the whitespace-separated data rows of `text` with the C parser."""
+    rows = "\n".join(data_row_pattern.findall(text))
+    return pd.read_csv(
+        io.StringIO(rows),
+        sep=r"\s+",
+        header=None,
+        names=names,
+        usecols=usecols,
+        **kwargs,
+    )
+
+
+def parse_co2(text):
+    # Rows are "year mean uncertainty", in ppm:
+    df = _data_rows(text, ["year", "co2"], [0, 1])
+    return df.astype({"year": "int32"}).set_index("year")
+
+
+def parse_sea_level(text):
+    # Rows are "fractional-year gmsl", averaged here into annual means:
+    df = _data_rows(text, ["year", "mm"], [0, 1])
+    df["year"] = np.floor(df["year"]).astype("int32")
+    return df.groupby("year").mean()
+
+
+def parse_ocean_temp(text):
+    # Column 13 is the January-December mean, in 0.01 degrees Celsius, "****" while the year is incomplete:
+    df = _data_rows(text, ["year", "temp"], [0, 13], na_values=["****"])
+    df = df.dropna().astype({"year": "int32"}).set_index("year")
+    df["temp"] = df["temp"] / 100
+    return df
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# Measured columns of the climate table, with their labels:
+MEASURES = {
+    "co2": "CO2 concentration (ppm)",
+    "mm": "Relative sea level (mm)",
+    "temp": "Relative temperature (°C)",
+}
+# Years averaged by the rolling means, centered on each year:
+WINDOW = 5
+
+
+def _trend(values):
+    """Least-squares line through the non-missing `values`, from their first to last year."""
+    known = values.dropna()
+    trend = pd.Series(np.nan, index=values.index)
+    if len(known) < 2:
+        return trend
+    slope, intercept = np.polyfit(known.index.to_numpy(float), known.to_numpy(), 1)
+    span = trend.index.slice_indexer(known.index[0], known.index[-1])
+    trend.iloc[span] = intercept + slope * trend.index[span].to_numpy(float)
+    return trend
+
+
+def combine(co2, sea_level, temp):
+    """One table indexed by every year from the first to the last measured one.
+
+    Besides the measures, each has "<measure>_mean", a centered rolling mean
+    over WINDOW years, "<measure>_trend", its linear trend, and
+    "<measure>_anomaly", its departure from that trend. Years a measure is
+    missing, before it starts, after it ends or in gaps, are NaN.
+    """
+    measured = pd.concat([co2["co2"], sea_level["mm"], temp["temp"]], axis=1)
+    measured = measured.reindex(
+        pd.RangeIndex(measured.index.min(), measured.index.max() + 1, name="year")
+    )
+
+    columns = {}
+    for measure in MEASURES:
+        values = measured[measure].astype(float)
+        trend = _trend(values)
+        columns[measure] = values
+        columns[f"{measure}_mean"] = (
+            values.rolling(WINDOW, center=True, min_periods=1)
+            .mean()
+            .where(values.notna())
+        )
+        columns[f"{measure}_trend"] = trend
+        columns[f"{measure}_anomaly"] = values - trend
+    return pd.DataFrame(columns)
+
+
+def columns(measure):
+    """The columns of the climate table describing `measure`."""
+    return [measure, f"{measure}_mean", f"{measure}_trend", f"{measure}_anomaly"]
+
+
+def bounds(df, measure):
+    """First and last year `measure` was measured, for the sliders."""
+    return int(df[measure].first_valid_index()), int(df[measure].last_valid_index())
+
+
+def slope(df, measure):
+    """Yearly increase of the linear trend of `measure`."""
+    trend = df[f"{measure}_trend"].dropna().to_numpy()
+    return float(trend[1] - trend[0]) if len(trend) > 1 else float("nan")
+
+
+def years(df, start, end):
+    """Rows of `df` from year `start` to year `end`, both included, as a view."""
+    index = df.index.to_numpy()
+    return df.iloc[
+        index.searchsorted(start, side="left") : index.searchsorted(end, side="right")
+    ]
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import threading
+
+import pandas as pd
+import pyarrow as pa
+
+# Memory-mapped datasets of this process, by file path:
+_datasets = {}
+_lock = threading.Lock()
+
+
+def write_file(path, write, mode="wb"):
+    """Atomically replace the file at `path` with what `write(f)` writes to `f`.
+
+    Every writer gets its own temporary file next to `path`, and `path` is
+    replaced, never truncated: processes that memory-mapped it keep reading
+    the version they mapped.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def write(path, df, metadata=None):
+    """Store `df` as an Arrow IPC file, atomically replacing the previous version.
+
+    `metadata` is a dict of strings saved in the file's schema.
+    """
+    table = pa.Table.from_pandas(df)
+    if metadata:
+        table = table.replace_schema_metadata(
+            {**table.schema.metadata, **{k: v.encode() for k, v in metadata.items()}}
+        )
+
+    def write_table(f):
+        with pa.ipc.new_file(f, table.schema) as writer:
+            writer.write_table(table)
+
+    write_file(path, write_table)
+
+
+def _freeze(frame):
+    """Make every numpy block read-only, returning the bytes of those that already were."""
+    mapped = 0
+    # pylint: disable=protected-access
+    for block in frame._mgr.blocks:
+        flags = getattr(block.values, "flags", None)
+        if flags is None:
+            continue
+        if flags.writeable:
+            flags.writeable = False
+        else:
+            mapped += block.values.nbytes
+    return mapped
+
+
+def _open(path):
+    mtime = os.stat(path).st_mtime_ns
+    with _lock:
+        entry = _datasets.get(path)
+    if entry is not None and entry["mtime"] == mtime:
+        return entry
+
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    # Numeric columns without missing values stay in the mapping, zero-copy:
+    frame = table.to_pandas(split_blocks=True)
+    copied = frame.memory_usage(deep=True).sum() - _freeze(frame)
+    entry = {"mtime": mtime, "table": table, "frame": frame, "copied": copied}
+    with _lock:
+        _datasets[path] = entry
+    return entry
+
+
+def read(path):
+    """Read-only DataFrame of the Arrow IPC file at `path`.
+
+    The file is memory-mapped, so its pages are shared by every process
+    reading it, and the frame is shared by every session of this process
+    until the file is replaced. Slices of it are views; writing to it raises.
+    """
+    return _open(path)["frame"]
+
+
+def metadata(path):
+    """The `metadata` dict the file at `path` was written with."""
+    schema_metadata = _open(path)["table"].schema.metadata or {}
+    return {k.decode(): v.decode() for k, v in schema_metadata.items()}
+
+
+def report():
+    """Rows and memory of every dataset mapped by this process.
+
+    "Shared MB" are the Arrow buffers in the mapping, counted once however
+    many sessions read them; "Copied MB" are columns pandas had to copy out
+    of it, such as strings.
+    """
+    with _lock:
+        entries = dict(_datasets)
+    rows = []
+    for path, entry in sorted(entries.items()):
+        rows.append(
+            {
+                "Dataset": os.path.splitext(os.path.basename(path))[0],
+                "Rows": len(entry["frame"]),
+                "Shared MB": entry["table"].nbytes / 1_000_000,
+                "Copied MB": entry["copied"] / 1_000_000,
+            }
+        )
+    return pd.DataFrame(rows, columns=["Dataset", "Rows", "Shared MB", "Copied MB"])
@@ -0,0 +1,173 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+
+from common import datasets, inflight
+from common.timing import cache_event
+
+CACHE_DIR = os.environ.get(
+    "STREAMLIT_DEMOS_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "streamlit-demos"),
+)
+
+# A refresh lock older than this is considered abandoned by a dead worker:
+LOCK_TIMEOUT = 300
+
+_memory = {}
+_refreshing = set()
+_lock = threading.Lock()
+
+
+def _key(name, args):
+    digest = hashlib.sha1(json.dumps([name, args], default=str).encode()).hexdigest()
+    return f"{name}-{digest[:16]}"
+
+
+def _paths(key):
+    base = os.path.join(CACHE_DIR, key)
+    return base + ".arrow", base + ".json", base + ".lock"
+
+
+def _read(key):
+    data_path, meta_path, _ = _paths(key)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        df = datasets.read(data_path)
+    except (OSError, ValueError):
+        return None
+    return df, meta["fetched_at"]
+
+
+def _write(key, df, fetched_at):
+    data_path, meta_path, _ = _paths(key)
+    # Both are replaced atomically, so readers in other processes never see a partial entry:
+    datasets.write(data_path, df)
+    datasets.write_file(
+        meta_path,
+        lambda f: json.dump({"fetched_at": fetched_at, "rows": len(df)}, f),
+        "w",
+    )
+
+
+def _claim(key):
+    """Claim the right to refresh an entry, across threads and worker processes."""
+    with _lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+
+    lock_path = _paths(key)[2]
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    try:
+        if time.time() - os.path.getmtime(lock_path) > LOCK_TIMEOUT:
+            os.remove(lock_path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL))
+    except FileExistsError:
+        _release(key, remove_lock=False)
+        return False
+    return True
+
+
+def _release(key, remove_lock=True):
+    if remove_lock:
+        try:
+            os.remove(_paths(key)[2])
+        except OSError:
+            pass
+    with _lock:
+        _refreshing.discard(key)
+
+
+def _load(func, key, args):
+    df = func(*args)
+    fetched_at = time.time()
+    try:
+        _write(key, df, fetched_at)
+        # Hand out the shared, read-only copy rather than this process's own:
+        df = datasets.read(_paths(key)[0])
+    except (OSError, TypeError, ValueError):
+        # Not persisted (read-only disk or a column Arrow cannot store), still cached in memory.
+        pass
+    _memory[key] = (df, fetched_at)
+    return df
+
+
+def _refresh(func, key, args):
+    """Reload an entry; concurrent refreshes and misses of it share one call to `func`."""
+    return inflight.share(("diskcache", key), lambda: _load(func, key, args))
+
+
+def _fill(func, key, args):
+    def load():
+        # A call that was loading the entry may have finished meanwhile:
+        entry = _memory.get(key) or _read(key)
+        return entry[0] if entry is not None else _load(func, key, args)
+
+    return inflight.share(("diskcache", key), load)
+
+
+def _refresh_in_background(func, key, args):
+    if not _claim(key):
+        return
+
+    def run():
+        try:
+            _refresh(func, key, args)
+        except Exception:  # pylint: disable=broad-except
+            # Keep serving the stale copy, the next stale read will retry.
+            pass
+        finally:
+            _release(key)
+
+    threading.Thread(target=run, name=f"refresh-{key}", daemon=True).start()
+
+
+def disk_cache(ttl):
+    """Cache a DataFrame loader on disk, shared by all worker processes.
+
+    Entries older than `ttl` seconds are still served while a single
+    background refresh replaces them. Concurrent misses and refreshes of an
+    entry in one process share a single call to the loader; background
+    refreshes are also claimed across processes.
+    """
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = _key(name, args)
+            entry = _memory.get(key) or _read(key)
+            if entry is None:
+                cache_event(name, "miss")
+                return _fill(func, key, args)
+
+            df, fetched_at = entry
+            _memory[key] = entry
+            if time.time() - fetched_at > ttl:
+                # Another process may already have refreshed the file on disk:
+                on_disk = _read(key)
+                if on_disk is not None and on_disk[1] > fetched_at:
+                    df, fetched_at = _memory[key] = on_disk
+            if time.time() - fetched_at > ttl:
+                cache_event(name, "stale")
+                _refresh_in_background(func, key, args)
+            else:
+                cache_event(name, "hit")
+            return df
+
+        def refresh(*args):
+            """Reload the entry now, in the calling thread."""
+            return _refresh(func, _key(name, args), args)
+
+        wrapper.refresh = refresh
+        return wrapper
+
+    return decorator
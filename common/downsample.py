@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Most points (or candles) a chart sends to the browser:
+MAX_POINTS = int(os.environ.get("STREAMLIT_DEMOS_MAX_POINTS", "1000"))
+
+# Candle widths tried from finest to coarsest, as pandas offsets and display names:
+RESOLUTIONS = (
+    (None, "daily"),
+    ("W-MON", "weekly"),
+    ("MS", "monthly"),
+    ("QS", "quarterly"),
+)
+
+
+def ohlc(df, max_points=MAX_POINTS):
+    """Candles of `df` at the finest calendar resolution fitting `max_points`.
+
+    Each candle opens at the first open of its period, closes at the last
+    close, spans the highest high and lowest low and sums the volume.
+    Returns the candles and the name of their resolution.
+    """
+    aggregations = {"Open": "first", "High": "max", "Low": "min", "Close": "last"}
+    if "Volume" in df:
+        aggregations["Volume"] = "sum"
+    for freq, name in RESOLUTIONS:
+        if freq is None:
+            candles = df
+        else:
+            candles = df.resample(freq, label="left", closed="left").agg(aggregations)
+            candles = candles.dropna(subset=["Open"])
+        if len(candles) <= max_points:
+            break
+    return candles, name
+
+
+def lttb(x, y, max_points=MAX_POINTS):
+    """Positions of at most `max_points` points keeping the visual shape of a line.
+
+    Largest-Triangle-Three-Buckets: the first and last points are kept, and
+    every bucket in between keeps the point forming the largest triangle with
+    the previously kept point and the average of the next bucket. Missing
+    values are never kept.
+    """
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) <= max_points or max_points < 3:
+        return valid
+    x = np.asarray(x, dtype=float)[valid]
+    y = y[valid]
+    n = len(y)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return valid[selected]
+
+
+def _numeric(values):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.DatetimeIndex(values).asi8.astype(float)
+    return np.asarray(values, dtype=float)
+
+
+def lines(df, max_points=MAX_POINTS, x=None):
+    """Rows of `df` to plot its columns as lines against the index (or column `x`).
+
+    Each column keeps its share of `max_points` by LTTB, and the union of the
+    kept rows is returned, so no line loses its peaks.
+    """
+    columns = [c for c in df.columns if c != x]
+    if len(df) <= max_points or not columns:
+        return df
+    xs = _numeric(df.index if x is None else df[x])
+    per_column = max(3, max_points // len(columns))
+    rows = np.unique(
+        np.concatenate([lttb(xs, df[c].to_numpy(), per_column) for c in columns])
+    )
+    return df.iloc[rows]
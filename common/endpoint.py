@@ -0,0 +1,42 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Endpoint servers of this process, by port:
+_servers = {}
+_lock = threading.Lock()
+
+
+def _handler(path, respond, content_type):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # pylint: disable=invalid-name
+            if self.path != path:
+                self.send_error(404)
+                return
+            status, text = respond()
+            body = text.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):  # pylint: disable=arguments-differ
+            pass
+
+    return Handler
+
+
+def serve(port, path, respond, content_type="text/plain"):
+    """Answer GET `path` on `port` with `respond()`'s (status, text), from a daemon thread.
+
+    Once per port and process; does nothing without a port.
+    """
+    with _lock:
+        if not port or port in _servers:
+            return
+        server = _servers[port] = ThreadingHTTPServer(
+            ("", port), _handler(path, respond, content_type)
+        )
+    threading.Thread(
+        target=server.serve_forever, name=f"endpoint-{path.strip('/')}", daemon=True
+    ).start()
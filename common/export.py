@@ -0,0 +1,93 @@
+import gzip
+import tempfile
+from collections import OrderedDict
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from common.lru import LRU
+from common.render import frame_digest
+
+# Format label -> (file extension, MIME type):
+FORMATS = OrderedDict(
+    [
+        ("CSV", ("csv", "text/csv")),
+        ("CSV (gzip)", ("csv.gz", "application/gzip")),
+        ("Parquet", ("parquet", "application/octet-stream")),
+    ]
+)
+
+CHUNK_ROWS = 10000
+# Bytes of built files kept, least recently downloaded dropped first:
+MAX_BYTES = 256 * 1024 * 1024
+
+_files = LRU(max_bytes=MAX_BYTES)
+
+
+def iter_csv(df):
+    """CSV bytes of `df`, CHUNK_ROWS rows at a time."""
+    yield df.iloc[:0].to_csv(index=False).encode()
+    for start in range(0, len(df), CHUNK_ROWS):
+        yield df.iloc[start : start + CHUNK_ROWS].to_csv(
+            index=False, header=False
+        ).encode()
+
+
+def _write(df, fmt, out):
+    if fmt == "CSV":
+        for chunk in iter_csv(df):
+            out.write(chunk)
+    elif fmt == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=out, mode="wb") as gz:
+            for chunk in iter_csv(df):
+                gz.write(chunk)
+    else:
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        with pq.ParquetWriter(out, schema) as writer:
+            for start in range(0, max(len(df), 1), CHUNK_ROWS):
+                chunk = df.iloc[start : start + CHUNK_ROWS]
+                writer.write_table(
+                    pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                )
+
+
+def export(df, fmt):
+    """File contents of `df` in format `fmt`, cached by the frame's content.
+
+    Streamlit 0.88's download button reads whatever it is given into bytes held
+    in memory, so the file is written chunk by chunk to a temporary file and
+    only its finished contents are read back. Files larger than MAX_BYTES are
+    not cached.
+    """
+    key = (frame_digest(df), fmt)
+    data = _files.get(key)
+    if data is not None:
+        return data
+
+    if df.index.name is not None:
+        # A named index (a date, a year) is data, not a row number:
+        df = df.reset_index()
+    with tempfile.TemporaryFile() as out:
+        _write(df, fmt, out)
+        out.seek(0)
+        data = out.read()
+    return _files.put(key, data)
+
+
+def download_widget(container, df, file_name, key=None):
+    """Format choice and a download button; the file is only built when asked for.
+
+    Pass a distinct `key` for every widget after the first one on a page.
+    """
+    fmt = container.selectbox(
+        "Download format:", list(FORMATS), key=key and f"{key}_format"
+    )
+    if container.button("📥 Prepare download", key=key and f"{key}_prepare"):
+        extension, mime = FORMATS[fmt]
+        container.download_button(
+            f"📥 Download data as {fmt} file",
+            export(df, fmt),
+            file_name=f"{file_name}.{extension}",
+            mime=mime,
+            key=key and f"{key}_download",
+        )
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common import datasets, inflight, upstream
+from common.diskcache import CACHE_DIR
+from common.timing import span
+
+POOL_SIZE = 16
+TIMEOUT = 30  # seconds
+# Least time between two requests to the same host, in seconds:
+MIN_INTERVAL = float(os.environ.get("STREAMLIT_DEMOS_MIN_INTERVAL", "0.2"))
+HOST_INTERVALS = {
+    "coinmarketcap.com": 1.0,
+    "api.coinmarketcap.com": 0.5,
+    # One request per stock history, from up to 16 workers at once:
+    "query2.finance.yahoo.com": 0.1,
+}
+# Bodies and validators (ETag, Last-Modified) of revalidated URLs:
+VALIDATORS_DIR = os.path.join(CACHE_DIR, "http")
+
+_hosts = {}
+_hosts_lock = threading.Lock()
+
+
+def _wait_turn(host):
+    with _hosts_lock:
+        state = _hosts.setdefault(host, {"lock": threading.Lock(), "next": 0.0})
+    with state["lock"]:
+        delay = state["next"] - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        state["next"] = time.monotonic() + HOST_INTERVALS.get(host, MIN_INTERVAL)
+
+
+class _Session(requests.Session):
+    def request(self, method, url, *args, **kwargs):
+        _wait_turn(upstream.host(url))
+        return super().request(method, url, *args, **kwargs)
+
+
+def make_session(pool_size=POOL_SIZE):
+    """HTTP session keeping up to `pool_size` keep-alive connections per host.
+
+    Every request waits for its turn at its host, so sessions handed to
+    libraries such as yfinance share the per-host rate limit. Certificates
+    are verified and responses are gzip-compressed, as requests does by
+    default.
+    """
+    session = _Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+session = make_session()
+
+
+def _paths(url):
+    base = os.path.join(VALIDATORS_DIR, hashlib.sha1(url.encode()).hexdigest())
+    return base + ".json", base + ".body"
+
+
+def _stored(url):
+    meta_path, body_path = _paths(url)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        with open(body_path, "rb") as f:
+            return meta, f.read()
+    except (OSError, ValueError):
+        return None
+
+
+def _store(url, response):
+    meta = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    if not any(meta.values()):
+        return
+    meta_path, body_path = _paths(url)
+    try:
+        # Body first, so stored validators always describe the stored body:
+        datasets.write_file(body_path, lambda f: f.write(response.content))
+        datasets.write_file(meta_path, lambda f: json.dump(meta, f), "w")
+    except OSError:
+        pass
+
+
+def _get(url, revalidate):
+    stored = _stored(url) if revalidate else None
+    headers = {}
+    if stored is not None:
+        meta, body = stored
+        if meta["etag"]:
+            headers["If-None-Match"] = meta["etag"]
+        if meta["last_modified"]:
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = session.get(upstream.url(url), headers=headers, timeout=TIMEOUT)
+    if stored is not None and response.status_code == 304:
+        return body
+    response.raise_for_status()
+    if revalidate:
+        _store(url, response)
+    return response.content
+
+
+def fetch(url, revalidate=False):
+    """Body of `url`, through the shared session and the per-host rate limit.
+
+    Concurrent calls for the same URL share a single request. With
+    `revalidate=True` the body is kept on disk and later calls send its
+    ETag/Last-Modified, so an unchanged file is not downloaded again.
+    """
+    with span("fetch"):
+        return inflight.share(("fetch", url), lambda: _get(url, revalidate))
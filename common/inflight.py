@@ -0,0 +1,33 @@
+import threading
+from concurrent.futures import Future
+
+_calls = {}
+_lock = threading.Lock()
+
+
+def share(key, func):
+    """Result of `func()`, computed once for all concurrent calls with the same `key`.
+
+    The first caller runs `func`; callers arriving before it returns wait for
+    its result, or its exception. Keys are hashable and shared by the whole
+    process, so callers prefix them with their own name.
+    """
+    with _lock:
+        future = _calls.get(key)
+        leader = future is None
+        if leader:
+            future = _calls[key] = Future()
+
+    if not leader:
+        return future.result()
+    try:
+        result = func()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+    finally:
+        with _lock:
+            del _calls[key]
+    return result
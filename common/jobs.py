@@ -0,0 +1,108 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from common.lru import LRU
+from common.timing import attach_run, current_run
+
+# Jobs running at once, however many sessions submit them:
+MAX_WORKERS = int(os.environ.get("STREAMLIT_DEMOS_JOB_WORKERS", "2"))
+# Jobs kept with their results, least recently asked for evicted first, never while running:
+MAX_ENTRIES = 64
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="job")
+_jobs = LRU(MAX_ENTRIES, evictable=lambda job: job.done)
+_lock = threading.Lock()
+
+
+class Cancelled(Exception):
+    """Raised by a job's progress callback once the job is cancelled."""
+
+
+class Job:
+    def __init__(self, key):
+        self.key = key
+        self.status = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.future = None
+        self._cancelled = threading.Event()
+        self._subscribers = set()
+        # Spans of the job are recorded on the script run that submitted it:
+        self._script_run = current_run()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def cancel_requested(self):
+        """Whether the job was told to stop, though it may still be running."""
+        return self._cancelled.is_set()
+
+    def report(self, fraction):
+        """Progress callback of the job function, raising Cancelled to stop it."""
+        if self._cancelled.is_set():
+            raise Cancelled()
+        self.progress = fraction
+
+    def subscribe(self, subscriber):
+        """Record that `subscriber`, e.g. a session, waits for this job."""
+        with self._lock:
+            self._subscribers.add(subscriber)
+
+    def cancel(self, subscriber):
+        """Stop waiting for the job, and stop it if no other subscriber still waits.
+
+        A stopped job ends at its next progress report, or before it starts.
+        """
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            if self._subscribers or self.done:
+                return
+            self._cancelled.set()
+        if self.future.cancel():
+            self.status = "cancelled"
+
+    def run(self, func, args, kwargs):
+        """Run `func` as this job, on a job pool thread."""
+        if self._cancelled.is_set():
+            self.status = "cancelled"
+            return
+        self.status = "running"
+        try:
+            with attach_run(self._script_run):
+                self.result = func(*args, progress=self.report, **kwargs)
+        except Cancelled:
+            self.status = "cancelled"
+        except Exception as e:  # pylint: disable=broad-except
+            self.error = e
+            self.status = "failed"
+        else:
+            self.progress = 1.0
+            self.status = "done"
+
+
+def submit(key, func, *args, **kwargs):
+    """Run `func(*args, progress=..., **kwargs)` on the job pool, once per `key`.
+
+    Every session asking for the same key gets the same job, so a finished
+    job hands its result out immediately. Failed and cancelled jobs are
+    submitted again.
+    """
+    with _lock:
+        job = _jobs.get(key)
+        stopped = job is None or job.cancel_requested
+        if not stopped and job.status not in ("failed", "cancelled"):
+            return job
+        job = _jobs.put(key, Job(key))
+        job.future = _pool.submit(job.run, func, args, kwargs)
+    return job
+
+
+def get(key):
+    """The job submitted under `key`, if it is still known."""
+    with _lock:
+        return _jobs.get(key)
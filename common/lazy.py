@@ -0,0 +1,27 @@
+import importlib
+import sys
+import time
+
+# Milliseconds spent importing each demo module, recorded on first use:
+_import_ms = {}
+
+
+def load_demo(target):
+    """Resolve a "package.module:function" target, importing the module on first use."""
+    module_name, func_name = target.split(":")
+    if module_name not in sys.modules:
+        start = time.perf_counter()
+        importlib.import_module(module_name)
+        _import_ms.setdefault(module_name, (time.perf_counter() - start) * 1000)
+    # import_module also waits for an import still running in another session's thread:
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def import_report(targets):
+    """Import time (ms) per demo name, for the demos whose module has been loaded."""
+    report = {}
+    for name, target in targets.items():
+        module_name = target.split(":")[0]
+        if module_name in _import_ms:
+            report[name] = round(_import_ms[module_name], 1)
+    return report
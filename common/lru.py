@@ -0,0 +1,65 @@
+import threading
+from collections import OrderedDict
+
+
+class LRU:
+    """Thread-safe cache evicting its least recently used entries first.
+
+    It keeps at most `max_entries` entries and, if given, at most `max_bytes`
+    as measured by `size(value)`; a value larger than `max_bytes` alone is not
+    kept. Entries for which `evictable(value)` is false, such as running jobs,
+    are never evicted.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, size=len, evictable=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = size
+        self.evictable = evictable
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """The value of `key`, now the most recently used, or `default`."""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        """Store `value` under `key` as the most recently used entry, and return it."""
+        nbytes = self.size(value) if self.max_bytes is not None else 0
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            if self.max_bytes is not None and nbytes > self.max_bytes:
+                return value
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            self._evict()
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def _full(self, count):
+        return (self.max_entries is not None and count > self.max_entries) or (
+            self.max_bytes is not None and self.nbytes > self.max_bytes
+        )
+
+    def _evict(self):
+        count = len(self._entries)
+        for key, (value, nbytes) in list(self._entries.items()):
+            if not self._full(count):
+                break
+            if self.evictable is None or self.evictable(value):
+                del self._entries[key]
+                self.nbytes -= nbytes
+                count -= 1
@@ -0,0 +1,41 @@
+import hashlib
+import io
+
+import pandas as pd
+from matplotlib.figure import Figure
+
+from common.lru import LRU
+from common.timing import span
+
+# Rendered images kept in memory, least recently used evicted first:
+MAX_ENTRIES = 256
+
+_images = LRU(MAX_ENTRIES)
+
+
+def frame_digest(df):
+    """Content hash of a frame, so a new dataset version never reuses an old image."""
+    return hashlib.sha1(pd.util.hash_pandas_object(df).values.tobytes()).hexdigest()
+
+
+def render(key, draw, fmt="png", **figure_kwargs):
+    """Image bytes of the chart drawn by `draw(ax)`, rendered once per `key`.
+
+    Figures are built with the object-oriented API, so they are never
+    registered with pyplot and are released as soon as they are saved.
+    """
+    key = (key, fmt, tuple(sorted(figure_kwargs.items())))
+    image = _images.get(key)
+    if image is not None:
+        return image
+
+    with span("render"):
+        fig = Figure(**figure_kwargs)
+        try:
+            draw(fig.subplots())
+            buf = io.BytesIO()
+            fig.savefig(buf, format=fmt, bbox_inches="tight")
+        finally:
+            fig.clear()
+
+    return _images.put(key, buf.getvalue())
@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from common import endpoint
+
+# Instrumentation is off unless enabled, and then costs one global lookup per span:
+ENABLED = os.environ.get("STREAMLIT_DEMOS_TIMING", "") not in ("", "0")
+METRICS_PORT = int(os.environ.get("STREAMLIT_DEMOS_METRICS_PORT", "0"))
+
+# Upper bounds of the latency histogram buckets, in seconds:
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+if ENABLED and not logger.handlers:
+    # One JSON document per line, for the log collector:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+
+_local = threading.local()
+_lock = threading.Lock()
+_histograms = {}
+_cache_events = {}
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, stage):
+        self.stage = stage
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        run = getattr(_local, "run", None)
+        demo = run["demo"] if run else "background"
+        if run:
+            run["spans"].append({"stage": self.stage, "ms": round(seconds * 1000, 2)})
+        _observe(demo, self.stage, seconds)
+        return False
+
+
+def _observe(demo, stage, seconds):
+    with _lock:
+        histogram = _histograms.setdefault(
+            (demo, stage), {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+        )
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+
+
+def span(stage):
+    """Context manager timing one stage (fetch, parse, transform, backtest, render)."""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(stage)
+
+
+def cache_event(loader, result):
+    """Record a cache "hit", "stale" or "miss" of a loader."""
+    if not ENABLED:
+        return
+    run = getattr(_local, "run", None)
+    if run:
+        run["cache"].append({"loader": loader, "result": result})
+    with _lock:
+        _cache_events[(loader, result)] = _cache_events.get((loader, result), 0) + 1
+
+
+def current_run():
+    """The run collecting this thread's spans, to hand to threads working for it."""
+    return getattr(_local, "run", None)
+
+
+class attach_run:  # pylint: disable=invalid-name
+    """Record this thread's spans on `run`, the result of another thread's current_run."""
+
+    def __init__(self, run):
+        self.run = run
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = getattr(_local, "run", None)
+        _local.run = self.run
+        return self.run
+
+    def __exit__(self, *exc):
+        _local.run = self.previous
+        return False
+
+
+class demo_run:  # pylint: disable=invalid-name
+    """Collect the spans of one script run of a demo; yields None when disabled."""
+
+    def __init__(self, demo):
+        self.demo = demo
+        self.run = None
+
+    def __enter__(self):
+        if ENABLED:
+            self.run = {"demo": self.demo, "spans": [], "cache": []}
+            self.run["start"] = time.perf_counter()
+            _local.run = self.run
+        return self.run
+
+    def __exit__(self, *exc):
+        if self.run is None:
+            return False
+        _local.run = None
+        seconds = time.perf_counter() - self.run.pop("start")
+        _observe(self.demo, "total", seconds)
+        logger.info(
+            json.dumps(
+                {
+                    "event": "demo_run",
+                    "demo": self.demo,
+                    "ms": round(seconds * 1000, 2),
+                    "spans": self.run["spans"],
+                    "cache": self.run["cache"],
+                }
+            )
+        )
+        return False
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_text():
+    """All metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP streamlit_demos_stage_seconds Latency of each demo stage.",
+        "# TYPE streamlit_demos_stage_seconds histogram",
+    ]
+    with _lock:
+        for (demo, stage), histogram in sorted(_histograms.items()):
+            labels = f'demo="{_label(demo)}",stage="{_label(stage)}"'
+            for bound, count in zip(BUCKETS, histogram["buckets"]):
+                lines.append(
+                    f'streamlit_demos_stage_seconds_bucket{{{labels},le="{bound}"}} {count}'
+                )
+            lines.append(
+                f'streamlit_demos_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram["count"]}'
+            )
+            lines.append(
+                f"streamlit_demos_stage_seconds_sum{{{labels}}} {histogram['sum']}"
+            )
+            lines.append(
+                f"streamlit_demos_stage_seconds_count{{{labels}}} {histogram['count']}"
+            )
+        lines += [
+            "# HELP streamlit_demos_cache_total Loader cache lookups by result.",
+            "# TYPE streamlit_demos_cache_total counter",
+        ]
+        for (loader, result), count in sorted(_cache_events.items()):
+            lines.append(
+                f'streamlit_demos_cache_total{{loader="{_label(loader)}",result="{result}"}} {count}'
+            )
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """Serve /metrics on `port` from a daemon thread, once per process."""
+    if ENABLED:
+        endpoint.serve(
+            port,
+            "/metrics",
+            lambda: (200, prometheus_text()),
+            "text/plain; version=0.0.4",
+        )
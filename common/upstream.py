@@ -0,0 +1,22 @@
+import os
+from urllib.parse import urlsplit
+
+# Base URL of a stand-in server replaying every upstream, e.g. for load tests:
+UPSTREAM = os.environ.get("STREAMLIT_DEMOS_UPSTREAM", "")
+
+
+def url(original):
+    """`original`, or its path on the stand-in server when one is configured."""
+    if not UPSTREAM:
+        return original
+    parts = urlsplit(original)
+    rewritten = f"{UPSTREAM.rstrip('/')}/{parts.netloc}{parts.path}"
+    return f"{rewritten}?{parts.query}" if parts.query else rewritten
+
+
+def host(url):
+    """Host of the upstream `url` stands for, also once rewritten by `url()`."""
+    base = UPSTREAM.rstrip("/") + "/"
+    if UPSTREAM and url.startswith(base):
+        return urlsplit("//" + url[len(base) :]).netloc
+    return urlsplit(url).netloc
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+
+import pandas as pd
+
+from common import endpoint
+from common.lazy import load_demo
+
+READY_PORT = int(os.environ.get("STREAMLIT_DEMOS_READY_PORT", "0"))
+# Seconds before a failed task is retried, whatever its schedule:
+RETRY_INTERVAL = 30
+
+# Task name -> (function warming it up, seconds between refreshes):
+TASKS = {
+    "Crypto chart": ("crypto.app:warm", 0),
+    "Crypto listings": ("crypto.app:warm_listings", 10 * 60),
+    "S&P 500 constituents": ("stocks.app:warm_constituents", 6 * 60 * 60),
+    "Default ticker": ("stocks.app:warm", 60 * 60),
+    "Climate": ("climate.app:warm", 6 * 60 * 60),
+}
+
+_tasks = {}
+_lock = threading.Lock()
+_started = False
+
+
+def _run(name):
+    task = _tasks[name]
+    started = time.perf_counter()
+    try:
+        load_demo(task["target"])(refresh=task["successes"] > 0)
+    except Exception as e:  # pylint: disable=broad-except
+        # Users load the dataset on demand meanwhile; the next run retries.
+        task["error"] = repr(e)
+    else:
+        task["error"] = None
+        task["successes"] += 1
+    task["seconds"] = time.perf_counter() - started
+    task["finished_at"] = time.time()
+    task["runs"] += 1
+
+
+def _loop(name):
+    _run(name)
+    while True:
+        task = _tasks[name]
+        time.sleep(task["interval"] if task["error"] is None else RETRY_INTERVAL)
+        _run(name)
+
+
+def start(tasks=TASKS):
+    """Run every task once now, then every `interval` seconds, in daemon threads.
+
+    `tasks` maps a name to a ("package.module:function", interval) pair. The
+    function fetches and precomputes what its demo shows by default, and
+    reloads it from upstream when called with refresh=True. A failed task is
+    retried after RETRY_INTERVAL seconds. Once per process.
+    """
+    global _started  # pylint: disable=global-statement
+    with _lock:
+        if _started:
+            return
+        _started = True
+        for name, (target, interval) in tasks.items():
+            _tasks[name] = {
+                "target": target,
+                "interval": interval,
+                "runs": 0,
+                "successes": 0,
+                "error": None,
+            }
+    for name in tasks:
+        threading.Thread(
+            target=_loop, args=(name,), name=f"warmup-{name}", daemon=True
+        ).start()
+
+
+def started():
+    """Whether warm-up runs in this process; serve.py starts it, `streamlit run` does not."""
+    with _lock:
+        return _started
+
+
+def ready():
+    """Whether every task has succeeded once, so the server may take traffic."""
+    with _lock:
+        return _started and all(task["successes"] for task in _tasks.values())
+
+
+def _readiness():
+    if ready():
+        return 200, "ok\n"
+    waiting = [
+        f"{name}: {task['error'] or 'warming up'}"
+        for name, task in list(_tasks.items())
+        if not task["successes"]
+    ]
+    return 503, "\n".join(waiting or ["warm-up not started"]) + "\n"
+
+
+def report():
+    """Schedule and last run of every task."""
+    rows = []
+    for name, task in list(_tasks.items()):
+        finished_at = task.get("finished_at")
+        rows.append(
+            {
+                "Task": name,
+                "Every (min)": task["interval"] / 60,
+                "Runs": task["runs"],
+                "Failed runs": task["runs"] - task["successes"],
+                "Last run (s)": task.get("seconds"),
+                "Finished": time.strftime("%H:%M:%S", time.localtime(finished_at))
+                if finished_at
+                else None,
+                "Error": task.get("error"),
+            }
+        )
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "Task",
+            "Every (min)",
+            "Runs",
+            "Failed runs",
+            "Last run (s)",
+            "Finished",
+            "Error",
+        ],
+    )
+
+
+def start_ready_server(port=READY_PORT):
+    """Serve /ready on `port`: 503 and the tasks not warmed up yet, then 200, once per process."""
+    endpoint.serve(port, "/ready", _readiness)
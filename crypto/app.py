@@ -1,12 +1,27 @@
-import base64
 import json
+import re
 from datetime import datetime
 
-import matplotlib.pyplot as plt
 import pandas as pd
-import requests
 import streamlit as st
-from bs4 import BeautifulSoup
+
+from common import downsample
+from common.diskcache import disk_cache
+from common.export import download_widget
+from common.fetch import fetch
+from common.render import frame_digest, render
+from common.timing import cache_event, span
+from crypto.listings import (
+    fetch_listings,
+    index_symbols,
+    listings_frame,
+    search_symbols,
+    top_symbols,
+)
+from crypto.poller import get_poller
+
+# Symbols offered by the multiselect at once, besides the selected ones:
+MAX_OPTIONS = 500
 
 periods = {
     "1 hour": "hour",
@@ -25,87 +40,152 @@ y_axis_plot = {
 }
 
 
-def filedownload(df):
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()  # strings <-> bytes conversions
-    href = f'<a href="data:file/csv;base64,{b64}" download="Crypto_'
-    href += f'{datetime.now().strftime("%Y-%m-%d_%H%M%S")}.csv">📥 Download data as CSV File</a>'
-    return href
+# Quote fields, in display order, as named in CoinMarketCap's listings:
+quote_fields = {
+    "1 hour change (%)": "percentChange1h",
+    "24 hours change (%)": "percentChange24h",
+    "7 days change (%)": "percentChange7d",
+    "Price": "price",
+    "24-hour volume": "volume24h",
+    "Market cap.": "marketCap",
+}
 
+next_data_pattern = re.compile(
+    rb'<script id="__NEXT_DATA__" type="application/json"[^>]*>(.*?)</script>',
+    re.DOTALL,
+)
 
-@st.cache
-def load_data(currency_price_unit):
-    # Web scraping of cryptos data
-    cmc = requests.get("https://coinmarketcap.com")
-    soup = BeautifulSoup(cmc.content, "html.parser")
 
-    data = soup.find("script", id="__NEXT_DATA__", type="application/json")
-    coins = {}
-    coin_data = json.loads(data.contents[0])
+def parse_snapshot(content):
+    # Cut the JSON payload out of the page instead of parsing the whole HTML tree:
+    coin_data = json.loads(next_data_pattern.search(content).group(1))
     listings = coin_data["props"]["initialState"]["cryptocurrency"]["listingLatest"][
         "data"
     ]
-    for i in listings:
-        coins[str(i["id"])] = i["slug"]
-
-    coin_name = []
-    coin_symbol = []
-    market_cap = []
-    percent_change_1h = []
-    percent_change_24h = []
-    percent_change_7d = []
-    price = []
-    volume_24h = []
-
-    for i in listings:
-        coin_name.append(i["slug"])
-        coin_symbol.append(i["symbol"])
-        market_cap.append(i["quote"][currency_price_unit]["marketCap"])
-        price.append(i["quote"][currency_price_unit]["price"])
-        percent_change_1h.append(i["quote"][currency_price_unit]["percentChange1h"])
-        percent_change_24h.append(i["quote"][currency_price_unit]["percentChange24h"])
-        percent_change_7d.append(i["quote"][currency_price_unit]["percentChange7d"])
-        volume_24h.append(i["quote"][currency_price_unit]["volume24h"])
-
-    df = pd.DataFrame(
-        columns=[
-            "Name",
-            "Symbol",
-            "1 hour change (%)",
-            "24 hours change (%)",
-            "7 days change (%)",
-            "Price",
-            "24-hour volume",
-            "Market cap.",
-        ]
+
+    columns = {
+        "Name": [i["slug"] for i in listings],
+        "Symbol": [i["symbol"] for i in listings],
+    }
+    for currency in listings[0]["quote"] if listings else []:
+        for column, field in quote_fields.items():
+            columns[f"{column} [{currency}]"] = [
+                i["quote"][currency][field] for i in listings
+            ]
+
+    # Sorted once here, so the largest coins are always the first rows:
+    return pd.DataFrame(columns).sort_values(
+        "Market cap. [USD]", ascending=False, kind="mergesort", ignore_index=True
     )
-    df["Name"] = coin_name
-    df["Symbol"] = coin_symbol
-    df["Price"] = price
-    df["1 hour change (%)"] = percent_change_1h
-    df["24 hours change (%)"] = percent_change_24h
-    df["7 days change (%)"] = percent_change_7d
-    df["24-hour volume"] = volume_24h
-    df["Market cap."] = market_cap
 
-    return df
+
+@disk_cache(ttl=60)
+def load_snapshot():
+    # Web scraping of cryptos data, quoted in every currency at once
+    content = fetch("https://coinmarketcap.com")
+    with span("parse"):
+        return parse_snapshot(content)
+
+
+@disk_cache(ttl=10 * 60)
+def load_listings():
+    # Every listed coin, a page of the listing API at a time:
+    listings = fetch_listings()
+    with span("parse"):
+        return listings_frame(listings)
+
+
+def load_data(currency_price_unit, universe="Top 100"):
+    if universe == "Top 100":
+        # Served from the background poller once it has a snapshot, never waiting on it:
+        df = get_poller(load_snapshot.refresh).snapshot
+        cache_event("crypto.poller.snapshot", "miss" if df is None else "hit")
+        if df is None:
+            df = load_snapshot()
+    else:
+        df = load_listings()
+    columns = {f"{column} [{currency_price_unit}]": column for column in quote_fields}
+    return df[["Name", "Symbol", *columns]].rename(columns=columns)
+
+
+def change_frame(df_selected_coin, time_resolution):
+    df_change = df_selected_coin.sort_values(by=y_axis_plot[time_resolution])
+    df_change["positive_percent_change_1h"] = df_change["1 hour change (%)"] > 0
+    df_change["positive_percent_change_24h"] = df_change["24 hours change (%)"] > 0
+    df_change["positive_percent_change_7d"] = df_change["7 days change (%)"] > 0
+    return df_change
+
+
+def change_png(df_change, time_resolution):
+    plot_settings = {
+        "color": df_change[orders[time_resolution]].map({True: "g", False: "r"}),
+        "xlabel": "",
+        "legend": False,
+    }
+
+    def draw(ax):
+        df_change.plot(
+            y=y_axis_plot[time_resolution],
+            x="Symbol",
+            kind="bar",
+            ax=ax,
+            **plot_settings,
+        )
+        ax.set_ylabel("Change (%)", fontweight="bold")
+
+    return render(("crypto", time_resolution, frame_digest(df_change)), draw)
+
+
+def warm(refresh=False):
+    """Render the default chart (USD, top 10, 7 days) of the latest snapshot.
+
+    When refreshing, first waits for the poller's next snapshot, so the
+    chart is ready before anyone asks for it.
+    """
+    poller = get_poller(load_snapshot.refresh)
+    if refresh:
+        poller.wait(poller.version, timeout=poller.interval)
+    df = load_data("USD")
+    df_selected_coin = df[df["Symbol"].isin(top_symbols(df, 10))]
+    change_png(change_frame(df_selected_coin, "7 days"), "7 days")
+
+
+def warm_listings(refresh=False):
+    """Load every listed coin, from CoinMarketCap when refreshing, and index the symbols."""
+    index_symbols(load_listings.refresh() if refresh else load_listings())
 
 
 def crypto():
+    poller = get_poller(load_snapshot.refresh)
+    version = poller.version
+
     currency_price_unit = st.sidebar.selectbox(
         "Currency in which price is displayed:", ("USD", "BTC", "ETH")
     )
     if currency_price_unit != "USD":
         currency_price_unit = currency_price_unit.lower()
 
-    df = load_data(currency_price_unit)
-
-    sorted_coin = sorted(df["Symbol"])
+    universe = st.sidebar.radio("Coins:", ("Top 100", "All listed coins"))
+
+    df = load_data(currency_price_unit, universe)
+
+    with span("transform"):
+        index = index_symbols(df)
+        query = st.sidebar.text_input("Search symbols:")
+        # The multiselect is rebuilt when its options change, so the selection is carried over by hand:
+        selection_key = f"crypto_selection:{universe}"
+        if selection_key in st.session_state:
+            selection = st.session_state[selection_key]
+        else:
+            selection = top_symbols(df, 10)
+        matches = search_symbols(index, query, MAX_OPTIONS)
+        options = sorted(set(selection).union(matches), key=str.upper)
     selected_coin = st.sidebar.multiselect(
         "Choose which cryptos to analyze:",
-        sorted_coin,
-        df.sort_values(by="Market cap.", ascending=False)["Symbol"][:10],
+        options,
+        selection,
     )
+    st.session_state[selection_key] = selected_coin
 
     df_selected_coin = df[(df["Symbol"].isin(selected_coin))]
 
@@ -113,32 +193,29 @@ def crypto():
         "Time resolution:", ["7 days", "24 hours", "1 hour"]
     )
 
-    df_change = df_selected_coin.sort_values(by=y_axis_plot[time_resolution])
+    df_change = change_frame(df_selected_coin, time_resolution)
 
-    col1, col2 = st.beta_columns((1, 2))
+    col1, col2 = st.columns((1, 2))
 
     col1.dataframe(
         df_selected_coin[["Name", "Symbol", "Price"]],
         height=df_selected_coin.shape[0] * 100,
     )
 
-    df_change["positive_percent_change_1h"] = df_change["1 hour change (%)"] > 0
-    df_change["positive_percent_change_24h"] = df_change["24 hours change (%)"] > 0
-    df_change["positive_percent_change_7d"] = df_change["7 days change (%)"] > 0
-
     col2.subheader(f"📈 Price change in the past {periods[time_resolution]}")
 
-    plot_settings = {
-        "color": df_change[orders[time_resolution]].map({True: "g", False: "r"}),
-        "xlabel": "",
-        "legend": False,
-    }
+    col2.image(change_png(df_change, time_resolution), use_column_width=True)
 
-    plt.figure()
-    df_change.plot(
-        y=y_axis_plot[time_resolution], x="Symbol", kind="bar", **plot_settings
+    download_widget(
+        col1, df_selected_coin, f"Crypto_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}"
     )
-    plt.ylabel("Change (%)", fontweight="bold")
-    col2.pyplot(plt)
 
-    col1.markdown(filedownload(df_selected_coin), unsafe_allow_html=True)
+    col2.subheader("🕒 Price history (USD) since the server started")
+    col2.line_chart(downsample.lines(poller.history(selected_coin)))
+
+    if st.sidebar.checkbox("Auto-refresh when new prices arrive"):
+        status = st.sidebar.empty()
+        while poller.wait(version, timeout=1) == version:
+            # Touching an element lets Streamlit interrupt the wait on widget changes.
+            status.text(f"Last update: {datetime.now().strftime('%H:%M:%S')}")
+        st.experimental_rerun()
@@ -0,0 +1,112 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from common.fetch import fetch
+from common.lru import LRU
+from common.render import frame_digest
+
+# CoinMarketCap's listing endpoint, the one its own pages are paginated with:
+LISTING_URL = "https://api.coinmarketcap.com/data-api/v3/cryptocurrency/listing"
+PAGE_SIZE = 1000
+# Pages downloaded at once; the fetch layer still spaces requests to the host:
+MAX_WORKERS = 4
+# Quote currencies, named as in the homepage snapshot:
+CURRENCIES = {"USD": "USD", "BTC": "btc", "ETH": "eth"}
+# Quote fields, in display order, with their column type:
+QUOTE_FIELDS = {
+    "1 hour change (%)": ("percentChange1h", "float32"),
+    "24 hours change (%)": ("percentChange24h", "float32"),
+    "7 days change (%)": ("percentChange7d", "float32"),
+    "Price": ("price", "float64"),
+    "24-hour volume": ("volume24h", "float64"),
+    "Market cap.": ("marketCap", "float64"),
+}
+
+# Symbol indexes kept, one per listings version and universe:
+MAX_INDEXES = 4
+
+_symbol_indexes = LRU(MAX_INDEXES)
+
+
+def page_url(start, limit=PAGE_SIZE):
+    """URL of `limit` listings from rank `start` (1-based), by market cap."""
+    return (
+        f"{LISTING_URL}?start={start}&limit={limit}&sortBy=market_cap&sortType=desc"
+        f"&convert={','.join(CURRENCIES)}&cryptoType=all&tagType=all&audited=false"
+    )
+
+
+def parse_page(content):
+    """Listings of one page, and the number of listings across all pages."""
+    data = json.loads(content)["data"]
+    return data["cryptoCurrencyList"], int(data["totalCount"])
+
+
+def fetch_listings(page_size=PAGE_SIZE, max_workers=MAX_WORKERS):
+    """Every listing, the first page telling how many more pages to download."""
+    listings, total = parse_page(fetch(page_url(1, page_size)))
+    starts = range(1 + page_size, total + 1, page_size)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for page in pool.map(lambda s: fetch(page_url(s, page_size)), starts):
+            listings.extend(parse_page(page)[0])
+    return listings
+
+
+def listings_frame(listings):
+    """Typed columns of `listings`, sorted by decreasing USD market cap.
+
+    Symbols, which repeat, are categorical and percentage changes float32. Being
+    presorted, the top N coins by market cap are the first N rows.
+    """
+    columns = {
+        "Name": [i["slug"] for i in listings],
+        "Symbol": pd.Categorical([i["symbol"] for i in listings]),
+    }
+    for currency, name in CURRENCIES.items():
+        quotes = [
+            next((q for q in i["quotes"] if q["name"] == currency), {})
+            for i in listings
+        ]
+        for column, (field, dtype) in QUOTE_FIELDS.items():
+            columns[f"{column} [{name}]"] = np.array(
+                [q.get(field, np.nan) for q in quotes], dtype=dtype
+            )
+    df = pd.DataFrame(columns)
+    return df.sort_values(
+        "Market cap. [USD]", ascending=False, kind="mergesort", ignore_index=True
+    )
+
+
+def index_symbols(df):
+    """Sorted unique symbols of `df`, with their upper-case forms to search them."""
+    key = frame_digest(df[["Symbol"]])
+    index = _symbol_indexes.get(key)
+    if index is None:
+        symbols = np.unique(df["Symbol"].astype(str).to_numpy())
+        upper = np.char.upper(symbols.astype(str))
+        order = np.argsort(upper, kind="mergesort")
+        index = _symbol_indexes.put(
+            key, {"symbols": symbols[order], "upper": upper[order]}
+        )
+    return index
+
+
+def search_symbols(index, query, limit=None):
+    """Symbols starting with `query`, ignoring case, in alphabetical order."""
+    query = query.strip().upper()
+    if not query:
+        return index["symbols"][:limit].tolist()
+    upper = index["upper"]
+    start = upper.searchsorted(query, side="left")
+    end = upper.searchsorted(query + "\uffff", side="left")
+    if limit is not None:
+        end = min(end, start + limit)
+    return index["symbols"][start:end].tolist()
+
+
+def top_symbols(df, n):
+    """Symbols of the `n` largest coins of a frame sorted by market cap."""
+    return df["Symbol"].iloc[:n].astype(str).tolist()
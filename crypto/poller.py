@@ -0,0 +1,103 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Snapshot columns recorded for every coin, quoted in USD:
+FIELDS = ["Price [USD]", "24-hour volume [USD]", "Market cap. [USD]"]
+
+
+class RingBuffer:
+    """Fixed-size time series of `FIELDS`, overwriting the oldest samples."""
+
+    def __init__(self, capacity):
+        self.times = np.zeros(capacity, dtype="datetime64[s]")
+        self.values = np.full((capacity, len(FIELDS)), np.nan)
+        self.count = 0
+
+    def append(self, timestamp, values):
+        i = self.count % len(self.times)
+        self.times[i] = timestamp
+        self.values[i] = values
+        self.count += 1
+
+    def to_frame(self):
+        size = len(self.times)
+        order = np.arange(max(0, self.count - size), self.count) % size
+        return pd.DataFrame(
+            self.values[order],
+            index=pd.DatetimeIndex(self.times[order], name="Time"),
+            columns=[f.split(" [")[0] for f in FIELDS],
+        )
+
+
+class Poller:
+    """Refreshes the crypto snapshot on a fixed interval in a daemon thread."""
+
+    def __init__(self, fetch, interval, capacity):
+        self.fetch = fetch
+        self.interval = interval
+        self.capacity = capacity
+        self.buffers = {}
+        self.snapshot = None
+        self.version = 0
+        self._updated = threading.Condition()
+
+    def start(self):
+        thread = threading.Thread(target=self._run, name="crypto-poller", daemon=True)
+        thread.start()
+
+    def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                self._record(self.fetch())
+            except Exception:  # pylint: disable=broad-except
+                # Keep the last snapshot and try again on the next tick.
+                pass
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def _record(self, df):
+        now = np.datetime64(int(time.time()), "s")
+        values = df[FIELDS].to_numpy(dtype=float)
+        for symbol, row in zip(df["Symbol"], values):
+            buffer = self.buffers.get(symbol)
+            if buffer is None:
+                buffer = self.buffers[symbol] = RingBuffer(self.capacity)
+            buffer.append(now, row)
+        with self._updated:
+            # Readers only ever see a complete snapshot, swapped in at once:
+            self.snapshot = df
+            self.version += 1
+            self._updated.notify_all()
+
+    def history(self, symbols, field="Price"):
+        """Wide frame of one recorded field for the given coins."""
+        return pd.DataFrame(
+            {
+                symbol: self.buffers[symbol].to_frame()[field]
+                for symbol in symbols
+                if symbol in self.buffers
+            }
+        )
+
+    def wait(self, version, timeout=None):
+        """Block until a snapshot newer than `version` arrives, return the latest version."""
+        with self._updated:
+            self._updated.wait_for(lambda: self.version > version, timeout)
+            return self.version
+
+
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def get_poller(fetch, interval=60, capacity=24 * 60):
+    """The process-wide poller, started on first use."""
+    global _poller  # pylint: disable=global-statement
+    with _poller_lock:
+        if _poller is None:
+            _poller = Poller(fetch, interval, capacity)
+            _poller.start()
+    return _poller
@@ -0,0 +1,72 @@
+import time
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+WIDGETS = {"selectbox", "radio", "multiselect", "slider", "checkbox", "text_input"}
+
+
+class Session:
+    """One simulated browser tab, speaking Streamlit's websocket protocol."""
+
+    def __init__(self, url):
+        self.url = url
+        self.widgets = {}
+        self.states = {}
+        self._ws = None
+
+    async def connect(self):
+        self._ws = await websocket_connect(self.url, max_message_size=256 * 1024 * 1024)
+
+    def close(self):
+        if self._ws is not None:
+            self._ws.close()
+
+    async def rerun(self):
+        """Rerun the script with the current widget values, return its latency in seconds."""
+        msg = BackMsg()
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        errors = []
+        start = time.perf_counter()
+        await self._ws.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            data = await self._ws.read_message()
+            if data is None:
+                raise ConnectionError("the server closed the session")
+            fwd = ForwardMsg()
+            fwd.ParseFromString(data)
+            kind = fwd.WhichOneof("type")
+            if kind == "report_finished":
+                if errors:
+                    raise RuntimeError("; ".join(errors))
+                return time.perf_counter() - start
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "exception":
+                    errors.append(
+                        f"{element.exception.type}: {element.exception.message}"
+                    )
+                elif element_type in WIDGETS:
+                    widget = getattr(element, element_type)
+                    self.widgets[widget.label] = (element_type, widget)
+
+    def set(self, label, value):
+        """Set a widget by label, as a user would, for the next rerun."""
+        kind, widget = self.widgets[label]
+        state = WidgetState(id=widget.id)
+        if kind in ("selectbox", "radio"):
+            state.int_value = list(widget.options).index(value)
+        elif kind == "multiselect":
+            state.int_array_value.data[:] = [
+                list(widget.options).index(v) for v in value
+            ]
+        elif kind == "slider":
+            state.double_array_value.data[:] = value
+        elif kind == "checkbox":
+            state.bool_value = value
+        else:
+            state.string_value = value
+        self.states[widget.id] = state
@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+
+from loadtest.client import Session
+from loadtest.upstream import Upstream
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _years(session, rng):
+    _, slider = session.widgets["Select a range of years to display:"]
+    low, high = sorted(rng.sample(range(int(slider.min), int(slider.max) + 1), 2))
+    return "Select a range of years to display:", [low, high]
+
+
+def _currency(session, rng):
+    label = "Currency in which price is displayed:"
+    return label, rng.choice(list(session.widgets[label][1].options))
+
+
+def _sectors(session, rng):
+    options = list(session.widgets["Industry sector:"][1].options)
+    return "Industry sector:", rng.sample(options, rng.randint(1, 3))
+
+
+def _moving_averages(session, rng):
+    label = rng.choice(
+        ["Exponential moving-average (EMA):", "Simple moving-average (SMA):"]
+    )
+    return label, [rng.randint(1, 30)]
+
+
+# Demo -> widget interaction a user repeats on that page:
+SCENARIOS = {
+    "Historic stock price and volume": _moving_averages,
+    "S&P 500 stock market index": _sectors,
+    "Cryptocurrency prices": _currency,
+    "Climate: CO2 concentration": _years,
+    "Climate: Sea level": _years,
+    "Climate: Ocean temperature": _years,
+    "Climate: Comparison": _years,
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _memory_kb(pid):
+    """Current and peak resident set size of a process, from /proc (Linux only)."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                fields[key] = value.split()[0] if value.split() else "0"
+    except OSError:
+        return None, None
+    return int(fields.get("VmRSS", 0)), int(fields.get("VmHWM", 0))
+
+
+def start_server(upstream_url, cache_dir):
+    """Start the app through serve.py and wait until its warm-up has finished."""
+    port, ready_port = _free_port(), _free_port()
+    env = dict(
+        os.environ,
+        STREAMLIT_DEMOS_UPSTREAM=upstream_url,
+        STREAMLIT_DEMOS_CACHE_DIR=cache_dir,
+        STREAMLIT_DEMOS_READY_PORT=str(ready_port),
+    )
+    command = [sys.executable, "serve.py"]
+    command += ["--server.headless", "true", "--server.port", str(port)]
+    command += ["--browser.gatherUsageStats", "false"]
+    process = subprocess.Popen(
+        command,
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for url in (
+        f"http://127.0.0.1:{port}/healthz",
+        f"http://127.0.0.1:{ready_port}/ready",
+    ):
+        for _ in range(600):
+            try:
+                with urllib.request.urlopen(url) as response:
+                    if response.status == 200:
+                        break
+            except OSError:
+                # Not listening yet, or 503 while warming up.
+                time.sleep(0.1)
+        else:
+            process.kill()
+            raise RuntimeError(f"the Streamlit server did not become ready: {url}")
+    return process, port
+
+
+async def simulate(url, demo, interactions, seed, latencies, errors):
+    rng = random.Random(seed)
+    session = Session(url)
+    try:
+        await session.connect()
+        await session.rerun()
+        session.set("Choose a demo:", demo)
+        latencies.append(await session.rerun())
+        for _ in range(interactions):
+            session.set(*SCENARIOS[demo](session, rng))
+            latencies.append(await session.rerun())
+    except Exception as e:  # pylint: disable=broad-except
+        errors.append(f"{demo}: {e!r}")
+    finally:
+        session.close()
+
+
+async def run_level(url, users, interactions, demos):
+    latencies, errors = [], []
+    await asyncio.gather(
+        *[
+            simulate(url, demos[i % len(demos)], interactions, i, latencies, errors)
+            for i in range(users)
+        ]
+    )
+    return latencies, errors
+
+
+def load_test(users, interactions, latency, demos):
+    upstream = Upstream(latency=latency).start()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        process, port = start_server(upstream.url, cache_dir)
+        try:
+            idle_rss, _ = _memory_kb(process.pid)
+            upstream.calls.clear()
+            upstream.not_modified.clear()
+            start = time.perf_counter()
+            latencies, errors = asyncio.run(
+                run_level(f"ws://127.0.0.1:{port}/stream", users, interactions, demos)
+            )
+            elapsed = time.perf_counter() - start
+            _, peak_rss = _memory_kb(process.pid)
+        finally:
+            process.terminate()
+            process.wait()
+            upstream.stop()
+
+    ms = np.array(latencies) * 1000
+    report = {
+        "users": users,
+        "reruns": len(latencies),
+        "errors": errors,
+        "throughput_per_s": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)) if len(ms) else None,
+        "p99_ms": float(np.percentile(ms, 99)) if len(ms) else None,
+        "upstream_calls": dict(upstream.calls),
+        "upstream_not_modified": dict(upstream.not_modified),
+    }
+    if idle_rss is not None:
+        report["peak_rss_mb"] = peak_rss / 1024
+        report["rss_per_session_mb"] = (peak_rss - idle_rss) / 1024 / users
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Drive concurrent simulated sessions through every demo."
+    )
+    parser.add_argument("--users", default="10,100,500", help="comma-separated levels")
+    parser.add_argument("--interactions", type=int, default=5)
+    parser.add_argument(
+        "--latency", type=float, default=0.2, help="stand-in upstream latency (s)"
+    )
+    parser.add_argument("--demo", action="append", choices=list(SCENARIOS))
+    parser.add_argument("--output", help="write the reports as JSON to this file")
+    args = parser.parse_args(argv)
+
+    reports = []
+    for users in map(int, args.users.split(",")):
+        report = load_test(
+            users, args.interactions, args.latency, args.demo or list(SCENARIOS)
+        )
+        reports.append(report)
+        print(
+            f"{users:5d} users: {report['throughput_per_s']:7.1f} reruns/s, "
+            f"p50 {report['p50_ms'] or 0:8.1f} ms, p99 {report['p99_ms'] or 0:8.1f} ms, "
+            f"peak RSS {report.get('peak_rss_mb', 0):7.1f} MB, "
+            f"{len(report['errors'])} errors, upstream calls {report['upstream_calls']}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import fixtures
+
+
+def chart_json(symbol, period1, period2):
+    """A Yahoo! Finance v8 chart response with daily bars in [period1, period2)."""
+    end = pd.Timestamp(period2, unit="s").normalize()
+    index = pd.bdate_range(pd.Timestamp(period1, unit="s").normalize(), end)
+    index = index[index < end]
+    # Same symbol, same prices, whatever range is asked for:
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    start = max(0, (index[0] - pd.Timestamp("2000-01-03")).days) if len(index) else 0
+    steps = rng.normal(0.0003, 0.015, start + len(index))
+    close = 100 * np.exp(np.cumsum(steps))[start:]
+    open_ = close * (1 + rng.normal(0, 0.005, len(index)))
+    quote = {
+        "open": open_.tolist(),
+        "high": (np.maximum(open_, close) * 1.005).tolist(),
+        "low": (np.minimum(open_, close) * 0.995).tolist(),
+        "close": close.tolist(),
+        "volume": rng.integers(1_000_000, 10_000_000, len(index)).tolist(),
+    }
+    result = {
+        "meta": {
+            "currency": "USD",
+            "symbol": symbol,
+            "exchangeTimezoneName": "America/New_York",
+            "instrumentType": "EQUITY",
+            "priceHint": 2,
+        },
+        "timestamp": [int(t.timestamp()) + 14 * 3600 for t in index],
+        "indicators": {"quote": [quote], "adjclose": [{"adjclose": quote["close"]}]},
+    }
+    return json.dumps({"chart": {"result": [result], "error": None}}).encode()
+
+
+class Upstream:
+    """Local HTTP server replaying every upstream of the demos.
+
+    Requests are served under /<original host>/<original path>, which is what
+    common.upstream.url produces, after `latency` seconds.
+    """
+
+    def __init__(self, latency=0.0, port=0):
+        self.latency = latency
+        self.calls = Counter()
+        self.not_modified = Counter()
+        self._lock = threading.Lock()
+        self._bodies = {
+            "coinmarketcap.com": fixtures.coinmarketcap_page(),
+            "en.wikipedia.org": fixtures.sp500_page().encode(),
+            "www.esrl.noaa.gov": fixtures.co2_text().encode(),
+            "sealevel.colorado.edu": fixtures.sea_level_text().encode(),
+            "data.giss.nasa.gov": fixtures.giss_text().encode(),
+        }
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def respond(self, path, query):
+        """Body served for "/<host>/<path>?<query>", or None for an unknown upstream."""
+        host, _, rest = path.lstrip("/").partition("/")
+        with self._lock:
+            self.calls[host] += 1
+        if host == "api.coinmarketcap.com":
+            params = {
+                k: int(v[0])
+                for k, v in parse_qs(query).items()
+                if k in ("start", "limit")
+            }
+            return fixtures.coinmarketcap_listing(**params)
+        if host.endswith("finance.yahoo.com") and "/chart/" in rest:
+            symbol = rest.rsplit("/", 1)[-1]
+            params = {
+                k: int(v[0])
+                for k, v in parse_qs(query).items()
+                if k.startswith("period")
+            }
+            return chart_json(symbol, params["period1"], params["period2"])
+        return self._bodies.get(host)
+
+    def _handler(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                time.sleep(upstream.latency)
+                parts = urlsplit(self.path)
+                body = upstream.respond(parts.path, parts.query)
+                if body is None:
+                    self.send_error(404)
+                    return
+                etag = f'"{zlib.crc32(body):08x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    with upstream._lock:  # pylint: disable=protected-access
+                        upstream.not_modified[parts.path.split("/")[1]] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
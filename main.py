@@ -2,9 +2,9 @@ from collections import OrderedDict
 
 import streamlit as st
 
-from climate.app import climate_co2, climate_ocean_temp, climate_sea_level
-from crypto.app import crypto
-from stocks.app import sp500, ticker_stock
+from common import datasets, warmup
+from common.lazy import import_report, load_demo
+from common.timing import demo_run, start_metrics_server
 
 st.set_page_config(layout="wide")
 
@@ -35,7 +35,7 @@ DEMOS = OrderedDict(
         (
             "Historic stock price and volume",
             (
-                ticker_stock,
+                "stocks.app:ticker_stock",
                 """
                 Historic stock prices and volumes for certain ticker symbol.
                 """,
@@ -44,7 +44,7 @@ DEMOS = OrderedDict(
         (
             "S&P 500 stock market index",
             (
-                sp500,
+                "stocks.app:sp500",
                 """
                 The [S&P 500](https://en.wikipedia.org/wiki/List_of_S%26P_500_companies) stock market index,
                 maintained by S&P Dow Jones Indices, comprises 505 common stocks issued by 500 large-cap companies
@@ -56,7 +56,7 @@ DEMOS = OrderedDict(
         (
             "Cryptocurrency prices",
             (
-                crypto,
+                "crypto.app:crypto",
                 """
                 Today's cryptocurrency prices according to [CoinMarketCap](https://coinmarketcap.com/).
                 """,
@@ -65,7 +65,7 @@ DEMOS = OrderedDict(
         (
             "Climate: CO2 concentration",
             (
-                climate_co2,
+                "climate.app:climate_co2",
                 """
                 Globally averaged atmospheric CO2 concentration on marine surface
                 according to NOAA's [Global Monitoring Laboratory](https://www.esrl.noaa.gov/gmd/).
@@ -75,7 +75,7 @@ DEMOS = OrderedDict(
         (
             "Climate: Sea level",
             (
-                climate_sea_level,
+                "climate.app:climate_sea_level",
                 """
                 Global mean sea level according to the [Sea Level Research Group](https://sealevel.colorado.edu/)
                 at the University of Colorado.
@@ -85,19 +85,32 @@ DEMOS = OrderedDict(
         (
             "Climate: Ocean temperature",
             (
-                climate_ocean_temp,
+                "climate.app:climate_ocean_temp",
                 """
                 Global annual mean of land-ocean temperatures change in Celsius degrees with respect to the 1951-1980 mean,
                 according to the [Goddard Institute for Space Studies](https://data.giss.nasa.gov/) from the NASA.
                 """,
             ),
         ),
+        (
+            "Climate: Comparison",
+            (
+                "climate.app:climate_comparison",
+                """
+                CO2 concentration, sea level and ocean temperature side by side, over the years all of them
+                were measured.
+                """,
+            ),
+        ),
     ]
 )
 
 
 demo_name = st.sidebar.selectbox("Choose a demo:", list(DEMOS.keys()), 0)
 demo = DEMOS[demo_name][0]
+if isinstance(demo, str):
+    # Heavy demo modules are only imported the first time they are selected:
+    demo = load_demo(demo)
 
 if demo_name == "👇":
     st.write("# Welcome 👋")
@@ -114,4 +127,34 @@ else:
     for i in range(10):
         st.empty()
 
-demo()
+start_metrics_server()
+with demo_run(demo_name) as run:
+    demo()
+
+if run is not None:
+    with st.sidebar.expander("Debug: stage timings"):
+        if run["spans"]:
+            st.table(run["spans"])
+        if run["cache"]:
+            st.table(run["cache"])
+
+with st.sidebar.expander("Demo import times (ms)"):
+    st.write(
+        import_report(
+            {
+                name: target
+                for name, (target, _) in DEMOS.items()
+                if isinstance(target, str)
+            }
+        )
+    )
+
+with st.sidebar.expander("Shared datasets"):
+    st.table(datasets.report())
+
+with st.sidebar.expander("Warm-up"):
+    if warmup.started():
+        st.write("Ready" if warmup.ready() else "Warming up...")
+        st.table(warmup.report())
+    else:
+        st.write("Off: start the app with `python serve.py` to warm it up.")
@@ -0,0 +1,21 @@
+"""Start the app with its datasets warmed up, e.g. `python serve.py --server.port 8501`.
+
+Arguments are passed on to `streamlit run main.py`. Every dataset is
+prefetched and every default view precomputed as the server starts, then
+refreshed on its own schedule in background threads. Set
+STREAMLIT_DEMOS_READY_PORT to serve /ready, which answers 503 until the
+first warm-up has succeeded. The schedule is common.warmup.TASKS.
+"""
+import os
+import sys
+
+from streamlit import cli
+
+from common import warmup
+
+if __name__ == "__main__":
+    warmup.start(warmup.TASKS)
+    warmup.start_ready_server()
+    main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    sys.argv = ["streamlit", "run", main_script, *sys.argv[1:]]
+    sys.exit(cli.main())
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+from common.lru import LRU
+from common.timing import span
+from stocks.store import get_histories
+
+TRADING_DAYS = 252
+VOLATILITY_WINDOW = 21  # trading days, about one month
+# Rows of the covariance matrix computed per block, bounding the temporaries:
+CHUNK = 128
+# Analyses kept in memory, least recently used evicted first:
+MAX_ENTRIES = 8
+
+_results = LRU(MAX_ENTRIES)
+
+
+def close_matrix(frames):
+    """Daily closes of every symbol aligned on the union of their dates, as float32."""
+    closes = pd.concat({symbol: df["Close"] for symbol, df in frames.items()}, axis=1)
+    return closes.sort_index().astype(np.float32)
+
+
+def daily_returns(closes):
+    """Simple daily returns; missing where either close is missing."""
+    values = closes.to_numpy(dtype=np.float32)
+    returns = values[1:] / values[:-1] - 1
+    return pd.DataFrame(returns, index=closes.index[1:], columns=closes.columns)
+
+
+def rolling_volatility(returns, window=VOLATILITY_WINDOW):
+    """Annualized standard deviation of the returns over a rolling window."""
+    volatility = returns.rolling(window, min_periods=window // 2).std()
+    return (volatility * np.sqrt(TRADING_DAYS)).astype(np.float32)
+
+
+def sector_means(frame, sectors):
+    """Equal-weighted average of the columns of each sector."""
+    return frame.T.groupby(frame.columns.map(sectors)).mean().T.astype(np.float32)
+
+
+def sector_performance(returns, sectors):
+    """Growth of one unit invested equally in every constituent of a sector."""
+    return (1 + sector_means(returns, sectors).fillna(0)).cumprod()
+
+
+def covariance_correlation(returns, min_periods=2, chunk=CHUNK):
+    """Pairwise covariance and correlation of the columns, ignoring missing values.
+
+    Matches DataFrame.cov and DataFrame.corr: every pair uses only the days
+    both symbols have a return. The sums over those days come from products
+    of the zero-filled returns with the presence mask, `chunk` rows at a time.
+    """
+    values = returns.to_numpy(dtype=np.float32)
+    present = ~np.isnan(values)
+    # Centering first keeps the float32 sums from cancelling:
+    x = np.where(present, values - np.nanmean(values, axis=0), 0).astype(np.float32)
+    m = present.astype(np.float32)
+    xx = x * x
+
+    k = values.shape[1]
+    cov = np.empty((k, k), dtype=np.float32)
+    corr = np.empty((k, k), dtype=np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i in range(0, k, chunk):
+            rows = slice(i, i + chunk)
+            n = m[:, rows].T @ m
+            sx = x[:, rows].T @ m
+            sy = m[:, rows].T @ x
+            sxy = x[:, rows].T @ x - sx * sy / n
+            vx = xx[:, rows].T @ m - sx * sx / n
+            vy = m[:, rows].T @ xx - sy * sy / n
+            valid = n >= min_periods
+            cov[rows] = np.where(valid, sxy / (n - 1), np.nan)
+            corr[rows] = np.where(valid, sxy / np.sqrt(vx * vy), np.nan)
+    np.clip(corr, -1, 1, out=corr)
+
+    labels = returns.columns
+    return (
+        pd.DataFrame(cov, index=labels, columns=labels),
+        pd.DataFrame(corr, index=labels, columns=labels),
+    )
+
+
+def sector_analytics(sectors, start, end):
+    """Returns, volatility and covariance of the `sectors` symbol -> sector mapping.
+
+    Cached by constituent set and date range, so going back to an earlier
+    selection reuses its result. None when no symbol has data in the range.
+    """
+    key = (tuple(sorted(sectors.items())), start, end)
+    result = _results.get(key)
+    if result is not None:
+        return result
+
+    frames = get_histories(list(sectors), start, end)
+    if not frames:
+        return None
+    with span("transform"):
+        returns = daily_returns(close_matrix(frames))
+        # Constituents grouped by sector, for the matrix layout:
+        returns = returns[sorted(returns.columns, key=lambda s: (sectors[s], s))]
+        volatility = rolling_volatility(returns)
+        covariance, correlation = covariance_correlation(returns)
+    result = {
+        "returns": returns,
+        "volatility": volatility,
+        "sector_volatility": sector_means(volatility, sectors),
+        "sector_performance": sector_performance(returns, sectors),
+        "covariance": covariance,
+        "correlation": correlation,
+    }
+
+    return _results.put(key, result)
@@ -1,11 +1,44 @@
-import base64
+import io
+import threading
+import time
+import uuid
 from datetime import date, datetime, timedelta
 
 import backtrader as bt
 import cufflinks as cf
+import numpy as np
 import pandas as pd
+import plotly.graph_objects as go
 import streamlit as st
-import yfinance as yf
+
+from common import downsample, jobs
+from common.diskcache import disk_cache
+from common.export import download_widget
+from common.fetch import fetch
+from common.lru import LRU
+from common.render import frame_digest
+from common.timing import span
+from stocks.analytics import VOLATILITY_WINDOW, sector_analytics
+from stocks.backtest import EventLog, run_sma_backtest, summary
+from stocks.indicators import moving_averages
+from stocks.store import get_history, valid_symbol
+from stocks.sweep import sweep
+
+# cufflinks re-reads and rewrites its config file while building a figure,
+# which breaks when several sessions chart at once:
+_quantfig_lock = threading.Lock()
+# Seconds between two progress reports of a running backtest:
+PROGRESS_INTERVAL = 0.25
+# Candlestick and volume figures kept in memory, least recently used evicted first:
+MAX_FIGURES = 32
+_quantfig_figures = LRU(MAX_FIGURES)
+
+# Filter indexes of the latest constituents table, by content digest:
+_constituent_indexes = LRU(1)
+
+# What the ticker page shows before any widget is touched:
+DEFAULT_TICKER = "MSFT"
+DEFAULT_DAYS = 30 * 3
 
 
 class MyBuySell(bt.observers.BuySell):
@@ -16,13 +49,16 @@ class MyBuySell(bt.observers.BuySell):
 
 
 class SmaStrategy(bt.Strategy):
-    params = (("ma_period", 20),)
+    params = (("ma_period", 20), ("progress", None))
 
     def __init__(self):
         self.strat_data = {
             "buy": list(),
             "sell": list(),
+            "trades": list(),
         }
+        self.events = EventLog()
+        self.reported_at = 0.0
 
         # keep track of close price in the series
         self.data_close = self.datas[0].close
@@ -32,13 +68,15 @@ class SmaStrategy(bt.Strategy):
         self.price = None
         self.comm = None
 
-        # add a simple moving average indicator
-        self.sma = bt.ind.SMA(self.datas[0], period=self.params.ma_period)
+        # add a simple moving average indicator, unless the feed already has one
+        if "sma" in self.datas[0].getlinealiases():
+            self.sma = self.datas[0].sma
+        else:
+            self.sma = bt.ind.SMA(self.datas[0], period=self.params.ma_period)
 
-    def log(self, txt):
-        """Logging function"""
-        dt = self.datas[0].datetime.date(0).isoformat()
-        st.write(f"{dt} --> {txt}")
+    def log(self, event, *values):
+        """Record an event of the current bar, see `EventLog.append`."""
+        self.events.append(self.datas[0].datetime.date(0), event, *values)
 
     def notify_order(self, order):
         if order.status in [order.Submitted, order.Accepted]:
@@ -57,7 +95,10 @@ class SmaStrategy(bt.Strategy):
                     }
                 )
                 self.log(
-                    f"BUY executed at Price: {order.executed.price:.2f}, Cost: {order.executed.value:.2f}, Commission: {order.executed.comm:.2f}"
+                    "BUY executed",
+                    order.executed.price,
+                    order.executed.value,
+                    order.executed.comm,
                 )
                 self.price = order.executed.price
                 self.comm = order.executed.comm
@@ -71,12 +112,15 @@ class SmaStrategy(bt.Strategy):
                     }
                 )
                 self.log(
-                    f"SELL executed at Price: {order.executed.price:.2f}, Cost: {order.executed.value:.2f}, Commission: {order.executed.comm:.2f}"
+                    "SELL executed",
+                    order.executed.price,
+                    order.executed.value,
+                    order.executed.comm,
                 )
 
         # report failed order
         elif order.status in [order.Canceled, order.Margin, order.Rejected]:
-            self.log("Order Failed")
+            self.log("Order failed")
 
         # set no pending order
         self.order = None
@@ -85,11 +129,22 @@ class SmaStrategy(bt.Strategy):
         if not trade.isclosed:
             return
 
-        self.log(
-            f"OPERATION RESULT --- Gross: {trade.pnl:.2f}, Net: {trade.pnlcomm:.2f}"
+        self.strat_data["trades"].append(
+            {
+                "opened": bt.num2date(trade.dtopen).date().isoformat(),
+                "closed": bt.num2date(trade.dtclose).date().isoformat(),
+                "pnl": trade.pnl,
+                "pnlcomm": trade.pnlcomm,
+            }
         )
+        self.log("Trade closed", np.nan, np.nan, np.nan, trade.pnl, trade.pnlcomm)
 
     def next(self):
+        # report progress at most every PROGRESS_INTERVAL seconds
+        if self.p.progress and time.monotonic() - self.reported_at > PROGRESS_INTERVAL:
+            self.reported_at = time.monotonic()
+            self.p.progress(len(self) / self.datas[0].buflen())
+
         # do nothing if an order is pending
         if self.order:
             return
@@ -98,15 +153,22 @@ class SmaStrategy(bt.Strategy):
         if not self.position:
             # buy condition
             if self.data_close[0] > self.sma[0]:
-                self.log(f"BUY created at Price: {self.data_close[0]:.2f}")
+                self.log("BUY created", self.data_close[0])
                 self.order = self.buy()
         else:
             # sell condition
             if self.data_close[0] < self.sma[0]:
-                self.log(f"SELL created at Price: {self.data_close[0]:.2f}")
+                self.log("SELL created", self.data_close[0])
                 self.order = self.sell()
 
 
+class SmaData(bt.feeds.PandasData):
+    """Price feed with a precomputed SMA in its "sma" column."""
+
+    lines = ("sma",)
+    params = (("sma", -1),)
+
+
 class SmaSignal(bt.Signal):
     params = (("period", 20),)
 
@@ -114,21 +176,95 @@ class SmaSignal(bt.Signal):
         self.lines.signal = self.data - bt.ind.SMA(period=self.p.period)
 
 
-def filedownload(df):
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()  # strings <-> bytes conversions
-    href = f'<a href="data:file/csv;base64,{b64}" '
-    href += f'download="SP500_{datetime.now().strftime("%Y-%m-%d")}.csv">📥 Download data as CSV File</a>'
-    return href
+def run_cerebro_backtest(
+    df, ma_period=20, cash=1000.0, commission=0.0, average=None, progress=None
+):
+    """Reference backtest of `SmaStrategy` through backtrader's event loop.
+
+    `average` is an already computed SMA of the closes over `ma_period` bars,
+    fed to the strategy instead of `bt.ind.SMA`. `progress` is called with the
+    fraction of bars processed, at most every PROGRESS_INTERVAL seconds.
+    """
+    if average is None:
+        data = bt.feeds.PandasData(dataname=df)
+    else:
+        data = SmaData(dataname=df.assign(sma=average))
+
+    # create a Cerebro entity
+    cerebro = bt.Cerebro(stdstats=False)
+
+    # set up the backtest
+    cerebro.adddata(data)
+    cerebro.broker.setcash(cash)
+    cerebro.broker.setcommission(commission=commission)
+    cerebro.addstrategy(SmaStrategy, ma_period=ma_period, progress=progress)
+    cerebro.addobserver(MyBuySell)
+    cerebro.addobserver(bt.observers.Value)
+
+    # run backtest
+    strategy = cerebro.run()[0]
+    result = dict(strategy.strat_data)
+    result["events"] = strategy.events.to_frame()
+    value = next(o for o in strategy.observers if isinstance(o, bt.observers.Value))
+    result["equity"] = pd.Series(
+        value.lines.value.get(size=len(value)), index=df.index, name="Value"
+    )
+    result["final_value"] = cerebro.broker.getvalue()
+    return result
+
+
+def quantfig_base(symbol, df):
+    """QuantFig candlestick and volume figure, as a dict, built once per dataset."""
+    key = (symbol, frame_digest(df))
+    with _quantfig_lock:
+        figure = _quantfig_figures.get(key)
+        if figure is None:
+            qf = cf.QuantFig(df, name=symbol, up_color="#00BB00", down_color="#EE0000")
+            qf.add_volume()
+            figure = _quantfig_figures.put(key, qf.iplot(asFigure=True).to_dict())
+        return figure
+
+
+def sweep_heatmap(results, metric):
+    grid = results.pivot_table(
+        index=["cash", "commission"], columns="ma_period", values=metric
+    )
+    fig = go.Figure(
+        go.Heatmap(
+            z=grid.values,
+            x=grid.columns,
+            y=[f"{cash:.0f} USD, {comm:.3%}" for cash, comm in grid.index],
+            colorscale="RdYlGn_r" if metric == "max_drawdown" else "RdYlGn",
+        )
+    )
+    fig.update_layout(title=metric, xaxis_title="SMA period")
+    return fig
+
+
+def warm(refresh=False):  # pylint: disable=unused-argument
+    """Fetch the default ticker's recent bars and build its chart and averages.
+
+    Refreshing needs nothing more: the store downloads every date it has not
+    recorded, and never records today's bar as final.
+    """
+    df = get_history(
+        DEFAULT_TICKER, date.today() - timedelta(days=DEFAULT_DAYS), date.today()
+    )
+    moving_averages(DEFAULT_TICKER, df)
+    quantfig_base(DEFAULT_TICKER, downsample.ohlc(df)[0])
 
 
 def ticker_stock():
-    tickerSymbol = st.sidebar.text_input(
-        "Ticker symbol (e.g. GOOGL, AAPL, MSFT, ...):", "MSFT"
-    ).upper()
+    tickerSymbol = (
+        st.sidebar.text_input(
+            "Ticker symbol (e.g. GOOGL, AAPL, MSFT, ...):", DEFAULT_TICKER
+        )
+        .strip()
+        .upper()
+    )
 
     date_start = st.sidebar.date_input(
-        "Select start time:", date.today() - timedelta(days=30 * 3)
+        "Select start time:", date.today() - timedelta(days=DEFAULT_DAYS)
     )
     date_end = st.sidebar.date_input("Select end time:", date.today())
     n_days = (date_end - date_start).days
@@ -138,25 +274,65 @@ def ticker_stock():
     ema = st.sidebar.slider("Exponential moving-average (EMA):", 1, 30, 7)
     sma = st.sidebar.slider("Simple moving-average (SMA):", 1, 30, 15)
 
-    tickerData = yf.Ticker(tickerSymbol)
-
-    tickerDf = tickerData.history(start=date_start, end=date_end)
+    if not valid_symbol(tickerSymbol):
+        st.error(f"{tickerSymbol!r} is not a ticker symbol.")
+        return
+    tickerDf = get_history(tickerSymbol, date_start, date_end)
+    if tickerDf.empty:
+        st.warning(f"No prices of {tickerSymbol} in the selected period.")
+        return
+
+    with span("transform"):
+        sma_frame, ema_frame = moving_averages(tickerSymbol, tickerDf)
+
+    with span("transform"):
+        # Only the chart is downsampled; export and backtests use every bar:
+        candles, resolution = downsample.ohlc(tickerDf)
+        averages = downsample.lines(
+            pd.DataFrame({f"SMA({sma})": sma_frame[sma], f"EMA({ema})": ema_frame[ema]})
+        )
 
-    qf = cf.QuantFig(
-        tickerDf, name=tickerSymbol, up_color="#00BB00", down_color="#EE0000"
+    with span("render"):
+        fig = go.Figure(quantfig_base(tickerSymbol, candles))
+        for name, color in zip(
+            averages.columns, ("rgba(219, 64, 82, 1.0)", "rgba(0, 128, 0, 1.0)")
+        ):
+            fig.add_scatter(
+                x=averages.index,
+                y=averages[name],
+                name=name,
+                yaxis="y2",
+                line=dict(color=color, width=1.3),
+            )
+
+    st.plotly_chart(fig, use_container_width=True)
+    if resolution != "daily":
+        st.caption(f"Showing {resolution} candles; narrow the dates to see daily ones.")
+
+    download_widget(
+        st,
+        tickerDf,
+        f"{tickerSymbol}_{datetime.now().strftime('%Y-%m-%d')}",
     )
-    qf.add_volume()
-    qf.add_sma(periods=sma, color="red")
-    qf.add_ema(periods=ema, color="green")
-
-    st.plotly_chart(qf.iplot(asFigure=True), use_container_width=True)
-
-    st.markdown(filedownload(tickerDf), unsafe_allow_html=True)
 
     pwd = st.sidebar.text_input(
         "Authenticate to launch the trading bot:", max_chars=50, type="password"
     )
 
+    mode = st.sidebar.radio("Backtest mode:", ("Single run", "Parameter sweep"))
+    if mode == "Single run":
+        engine = st.sidebar.radio(
+            "Backtest engine:", ("Vectorized", "Backtrader (reference)")
+        )
+    else:
+        ma_range = st.sidebar.slider("SMA periods to sweep:", 2, 100, (5, 50))
+        cashes = st.sidebar.multiselect(
+            "Starting cash (USD):", [1000.0, 5000.0, 10000.0], [1000.0]
+        )
+        commissions = st.sidebar.multiselect(
+            "Commission (fraction of value):", [0.0, 0.001, 0.005], [0.0]
+        )
+
     status = {"message": "", "auth": False}
     if st.sidebar.button("Login"):
         if pwd == st.secrets["PASSWORD"]:
@@ -168,74 +344,239 @@ def ticker_stock():
 
         st.sidebar.write(status["message"])
 
+    # Jobs are shared by every session asking for the same data and parameters:
+    data_key = (tickerSymbol, date_start, date_end, frame_digest(tickerDf))
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
     if status["auth"]:
         st.sidebar.write("You are logged in.")
-        st.write("Launching trading bot with SMA strategy ...")
+        if mode == "Parameter sweep":
+            job = jobs.submit(
+                ("sweep", ma_range, tuple(cashes), tuple(commissions)) + data_key,
+                run_sweep,
+                tickerDf,
+                range(ma_range[0], ma_range[1] + 1),
+                cashes or [1000.0],
+                commissions or [0.0],
+            )
+        else:
+            ma_period = 20
+            job = jobs.submit(
+                ("single", engine, ma_period, 1000.0) + data_key,
+                run_backtest,
+                engine,
+                tickerDf,
+                ma_period=ma_period,
+                cash=1000.0,
+                average=sma_frame[ma_period].to_numpy(),
+            )
+        previous = jobs.get(st.session_state.get("backtest_job"))
+        if previous is not None and previous is not job:
+            previous.cancel(st.session_state.session_id)
+        job.subscribe(st.session_state.session_id)
+        st.session_state.backtest_job = job.key
 
-        data = bt.feeds.PandasData(dataname=tickerDf)
+    elif status["message"]:
+        st.sidebar.write("Please, authenticate to start trading.")
 
-        # create a Cerebro entity
-        cerebro = bt.Cerebro(stdstats=False)
+    # The job outlives the rerun that started it, so later reruns pick it up again:
+    job = jobs.get(st.session_state.get("backtest_job"))
+    if job is not None and job.key[-len(data_key) :] != data_key:
+        # Results of another ticker or period: never show them under this chart.
+        job.cancel(st.session_state.session_id)
+        del st.session_state.backtest_job
+    elif job is not None:
+        show_backtest(job, st.session_state.session_id)
 
-        # set up the backtest
-        cerebro.adddata(data)
-        cerebro.broker.setcash(1000.0)
-        cerebro.addstrategy(SmaStrategy)
-        cerebro.addobserver(MyBuySell)
-        cerebro.addobserver(bt.observers.Value)
 
-        # run backtest
-        st.markdown(
-            f"### Starting Portfolio Value: {cerebro.broker.getvalue():.2f} USD"
-        )
-        cerebro.run()
-        st.markdown(f"### Final Portfolio Value: {cerebro.broker.getvalue():.2f} USD")
+def run_sweep(df, ma_periods, cashes, commissions, progress):
+    with span("backtest"):
+        return sweep(df, ma_periods, cashes, commissions, progress=progress)
 
-    elif status["message"]:
-        st.sidebar.write("Please, authenticate to start trading.")
+
+def run_backtest(engine, df, ma_period, cash, average, progress):
+    with span("backtest"):
+        if engine == "Backtrader (reference)":
+            result = run_cerebro_backtest(
+                df, ma_period=ma_period, cash=cash, average=average, progress=progress
+            )
+        else:
+            result = run_sma_backtest(
+                df, ma_period=ma_period, cash=cash, average=average
+            )
+    return dict(result, cash=cash)
+
+
+def show_backtest(job, session_id):
+    if not job.done:
+        st.write("Backtesting the SMA strategy ...")
+        if st.button("Cancel backtest"):
+            # Other sessions waiting for the same job keep it running:
+            job.cancel(session_id)
+            del st.session_state.backtest_job
+            st.write("Backtest cancelled.")
+            return
+        progress = st.progress(job.progress)
+        while not job.done:
+            time.sleep(PROGRESS_INTERVAL)
+            progress.progress(job.progress)
+        progress.empty()
+
+    if job.status == "cancelled":
+        st.write("Backtest cancelled.")
+        return
+    if job.status == "failed":
+        st.error(f"Backtest failed: {job.error!r}")
+        return
+
+    if job.key[0] == "sweep":
+        st.dataframe(job.result)
+        for metric in ("final_value", "sharpe", "max_drawdown"):
+            st.plotly_chart(sweep_heatmap(job.result, metric), use_container_width=True)
+        return
+
+    result = job.result
+    st.markdown(f"### Starting Portfolio Value: {result['cash']:.2f} USD")
+    st.markdown(f"### Final Portfolio Value: {result['final_value']:.2f} USD")
+    col1, col2 = st.columns((1, 2))
+    col1.table(summary(result, result["cash"]))
+    col2.line_chart(downsample.lines(result["equity"].to_frame()))
+    st.dataframe(result["events"])
+
+
+def parse_constituents(html):
+    """Constituents table with display column names and categorical sectors."""
+    df = pd.read_html(io.StringIO(html), attrs={"id": "constituents"}, header=0)[0]
+    df = df.drop(columns=["SEC filings", "CIK"], errors="ignore").rename(
+        columns={
+            "Security": "Name",
+            "Date first added": "Date added",
+            "GICS Sector": "Sector",
+            "GICS Sub-Industry": "Sub-Sector",
+        }
+    )
+    return df.astype({"Sector": "category", "Sub-Sector": "category"})
 
 
-@st.cache
+@disk_cache(ttl=24 * 60 * 60)
 def load_data():
     # Web scraping of S&P 500 data
     url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-    html = pd.read_html(url, header=0)
-    df = html[0]
-    return df
+    html = fetch(url).decode()
+    with span("parse"):
+        return parse_constituents(html)
+
+
+def warm_constituents(refresh=False):
+    """Load the S&P 500 constituents, from Wikipedia when refreshing, and index them."""
+    index_constituents(load_data.refresh() if refresh else load_data())
+
+
+def index_constituents(df):
+    """Sorted filter options and row positions per (sector, sub-sector) of a constituents table."""
+    key = frame_digest(df)
+    index = _constituent_indexes.get(key)
+    if index is None:
+        rows = df.groupby(["Sector", "Sub-Sector"], observed=True).indices
+        sub_sectors = {}
+        for sector, sub_sector in sorted(rows):
+            sub_sectors.setdefault(sector, []).append(sub_sector)
+        index = _constituent_indexes.put(
+            key,
+            {"sectors": sorted(sub_sectors), "sub_sectors": sub_sectors, "rows": rows},
+        )
+    return index
+
+
+def sector_options(index):
+    return index["sectors"]
+
+
+def sub_sector_options(index, selected_sector):
+    return sorted(
+        {sub for sector in selected_sector for sub in index["sub_sectors"][sector]}
+    )
+
+
+def select_constituents(df, index, selected_sector, selected_sub_sector):
+    selected_sub_sector = set(selected_sub_sector)
+    rows = [
+        index["rows"][(sector, sub_sector)]
+        for sector in selected_sector
+        for sub_sector in index["sub_sectors"][sector]
+        if sub_sector in selected_sub_sector
+    ]
+    if not rows:
+        return df.iloc[:0]
+    return df.iloc[np.sort(np.concatenate(rows))]
 
 
 def sp500():
     df = load_data()
+    index = index_constituents(df)
 
-    sorted_sector_unique = sorted(df["GICS Sector"].unique())
     selected_sector = st.sidebar.multiselect(
-        "Industry sector:", sorted_sector_unique, []
+        "Industry sector:", sector_options(index), []
     )
 
-    df_selected_sector = df[(df["GICS Sector"].isin(selected_sector))]
-
-    sorted_sub_sector_unique = sorted(df_selected_sector["GICS Sub-Industry"].unique())
+    sorted_sub_sector_unique = sub_sector_options(index, selected_sector)
     selected_sub_sector = st.sidebar.multiselect(
         "Sub-sector:", sorted_sub_sector_unique, sorted_sub_sector_unique
     )
 
-    df_selected_sub_sector = df_selected_sector[
-        (df_selected_sector["GICS Sub-Industry"].isin(selected_sub_sector))
-    ]
+    with span("transform"):
+        df_selected_sub_sector = select_constituents(
+            df, index, selected_sector, selected_sub_sector
+        )
 
     st.write(
         f"Found {df_selected_sub_sector.shape[0]} companies in the selected sectors."
     )
-    df_selected_sub_sector.pop("SEC filings")
-    df_selected_sub_sector.pop("CIK")
-    df_selected_sub_sector.rename(
-        columns={
-            "Security": "Name",
-            "Date first added": "Date added",
-            "GICS Sector": "Sector",
-            "GICS Sub-Industry": "Sub-Sector",
-        },
-        inplace=True,
-    )
     st.dataframe(df_selected_sub_sector, height=df_selected_sub_sector.shape[0] * 50)
-    st.markdown(filedownload(df_selected_sub_sector), unsafe_allow_html=True)
+    download_widget(
+        st, df_selected_sub_sector, f"SP500_{datetime.now().strftime('%Y-%m-%d')}"
+    )
+
+    st.header("Sector analysis")
+    if df_selected_sub_sector.empty or not st.checkbox(
+        "Analyze the price history of the selected companies", False
+    ):
+        return
+
+    col1, col2 = st.columns(2)
+    date_start = col1.date_input(
+        "Analysis start:", date.today() - timedelta(days=365), key="analysis_start"
+    )
+    date_end = col2.date_input("Analysis end:", date.today(), key="analysis_end")
+    # Yahoo! Finance writes share classes with a dash (BRK-B) where Wikipedia uses a dot (BRK.B):
+    symbols = df_selected_sub_sector["Symbol"].str.replace(".", "-", regex=False)
+    sectors = dict(zip(symbols, df_selected_sub_sector["Sector"].astype(str)))
+
+    with st.spinner(f"Loading the price history of {len(sectors)} companies..."):
+        analytics = sector_analytics(sectors, date_start, date_end)
+    if analytics is None:
+        st.write("No price history found in the selected dates.")
+        return
+
+    st.subheader("Sector performance (equal-weighted)")
+    st.line_chart(downsample.lines(analytics["sector_performance"]))
+    st.subheader(f"Average {VOLATILITY_WINDOW}-day volatility (annualized)")
+    st.line_chart(downsample.lines(analytics["sector_volatility"]))
+
+    correlation = analytics["correlation"]
+    st.subheader(f"Correlation of daily returns ({correlation.shape[0]} companies)")
+    fig = go.Figure(
+        go.Heatmap(
+            z=correlation.values,
+            x=correlation.columns,
+            y=correlation.index,
+            zmin=-1,
+            zmax=1,
+            colorscale="RdBu_r",
+        )
+    )
+    fig.update_layout(height=700, yaxis_autorange="reversed")
+    st.plotly_chart(fig, use_container_width=True)
+    download_widget(
+        st, analytics["covariance"].reset_index(), "SP500_covariance", key="covariance"
+    )
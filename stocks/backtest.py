@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+
+
+def sma(values, period):
+    """Simple moving average, NaN until `period` values are available."""
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(values, period)
+        out[period - 1 :] = windows.mean(axis=1)
+    return out
+
+
+EVENTS = (
+    "BUY created",
+    "SELL created",
+    "BUY executed",
+    "SELL executed",
+    "Order failed",
+    "Trade closed",
+)
+
+
+class EventLog:
+    """Backtest events in a preallocated structured array, doubled when full."""
+
+    dtype = np.dtype(
+        [
+            ("time", "datetime64[D]"),
+            ("event", "u1"),
+            ("price", "f8"),
+            ("value", "f8"),
+            ("commission", "f8"),
+            ("pnl", "f8"),
+            ("pnlcomm", "f8"),
+        ]
+    )
+
+    def __init__(self, capacity=256):
+        self.rows = np.empty(capacity, dtype=self.dtype)
+        self.size = 0
+
+    def append(self, time, event, *values):
+        """Record an event; `values` fill price, value, commission, pnl, pnlcomm in order."""
+        if self.size == len(self.rows):
+            self.rows = np.concatenate([self.rows, np.empty_like(self.rows)])
+        values += (np.nan,) * (5 - len(values))
+        self.rows[self.size] = (time, EVENTS.index(event)) + values
+        self.size += 1
+
+    def to_frame(self):
+        rows = self.rows[: self.size]
+        df = pd.DataFrame({name: rows[name] for name in self.dtype.names})
+        df["event"] = pd.Categorical.from_codes(rows["event"], EVENTS)
+        return df
+
+
+def performance(equity, periods_per_year=252):
+    returns = equity.pct_change().dropna()
+    std = returns.std()
+    sharpe = returns.mean() / std * np.sqrt(periods_per_year) if std > 0 else 0.0
+    drawdown = 1 - equity / equity.cummax()
+    return sharpe, drawdown.max()
+
+
+def summary(result, cash):
+    """Headline statistics of a backtest result, as a one-column frame."""
+    trades = pd.DataFrame(result["trades"], columns=["pnl", "pnlcomm"])
+    sharpe, max_drawdown = performance(result["equity"])
+    commissions = sum(f["commission"] for f in result["buy"] + result["sell"])
+    stats = {
+        "Final value (USD)": result["final_value"],
+        "Return": result["final_value"] / cash - 1,
+        "Sharpe ratio": sharpe,
+        "Max drawdown": max_drawdown,
+        "Closed trades": len(trades),
+        "Winning trades": (trades["pnlcomm"] > 0).mean() if len(trades) else np.nan,
+        "Net P&L (USD)": trades["pnlcomm"].sum(),
+        "Commissions (USD)": commissions,
+    }
+    return pd.Series(stats, name="Value", dtype=object).to_frame()
+
+
+def _fill(order_bar, price, size, commission):
+    return {
+        "bar": order_bar,
+        "price": price,
+        "cost": price * size,
+        "commission": abs(size) * commission * price,
+    }
+
+
+def run_sma_backtest(
+    df, ma_period=20, cash=1000.0, commission=0.0, size=1, average=None
+):
+    """Vectorized equivalent of running `SmaStrategy` through `bt.Cerebro`.
+
+    Mirrors backtrader's default broker: market orders created on a bar fill at
+    the next bar's open, and a buy is rejected (and retried on the next signal
+    bar) when the cash cannot cover it at either the creation close or the
+    fill open. `commission` is a fraction of the traded value. `average` is an
+    already computed SMA of the closes over `ma_period` bars, if there is one.
+    """
+    open_ = df["Open"].to_numpy(dtype=float)
+    close = df["Close"].to_numpy(dtype=float)
+    dates = [d.date().isoformat() for d in pd.to_datetime(df.index)]
+    n = len(close)
+
+    if average is None:
+        average = sma(close, ma_period)
+    average = np.asarray(average, dtype=float)
+    with np.errstate(invalid="ignore"):
+        buy_bars = np.flatnonzero(close[:-1] > average[:-1])
+        sell_bars = np.flatnonzero(close[:-1] < average[:-1])
+
+    def affordable(price):
+        # Same operation order as backtrader's broker, to reject the same orders:
+        return cash - price * size - abs(size) * commission * price >= 0.0
+
+    buys, sells, trades = [], [], []
+    events = EventLog()
+    position = np.zeros(n)
+    cash_curve = np.full(n, cash)
+    start = 0
+    while True:
+        candidates = buy_bars[np.searchsorted(buy_bars, start) :]
+        ok = affordable(close[candidates]) & affordable(open_[candidates + 1])
+        failed = candidates[: np.argmax(ok)] if ok.any() else candidates
+        for bar in failed:
+            events.append(dates[bar], "BUY created", close[bar])
+            events.append(dates[bar + 1], "Order failed")
+        if not ok.any():
+            break
+        entry = candidates[np.argmax(ok)] + 1
+        buy = _fill(entry, open_[entry], size, commission)
+        cash -= buy["cost"] + buy["commission"]
+        cash_curve[entry:] = cash
+        buys.append(buy)
+        events.append(dates[entry - 1], "BUY created", close[entry - 1])
+        events.append(
+            dates[entry], "BUY executed", buy["price"], buy["cost"], buy["commission"]
+        )
+
+        exits = sell_bars[np.searchsorted(sell_bars, entry) :]
+        if not len(exits):
+            position[entry:] = size
+            break
+        exit_ = exits[0] + 1
+        position[entry:exit_] = size
+        sell = _fill(exit_, open_[exit_], -size, commission)
+        cash += sell["price"] * size - sell["commission"]
+        # backtrader reports the value of a closing order at the position's entry price:
+        sell["cost"] = buy["cost"]
+        cash_curve[exit_:] = cash
+        sells.append(sell)
+        events.append(dates[exit_ - 1], "SELL created", close[exit_ - 1])
+        events.append(
+            dates[exit_],
+            "SELL executed",
+            sell["price"],
+            sell["cost"],
+            sell["commission"],
+        )
+
+        pnl = (sell["price"] - buy["price"]) * size
+        trades.append(
+            {
+                "opened": dates[entry],
+                "closed": dates[exit_],
+                "pnl": pnl,
+                "pnlcomm": pnl - buy["commission"] - sell["commission"],
+            }
+        )
+        events.append(
+            dates[exit_],
+            "Trade closed",
+            np.nan,
+            np.nan,
+            np.nan,
+            pnl,
+            trades[-1]["pnlcomm"],
+        )
+        start = exit_
+
+    # An order created on the last bar never fills:
+    if n and position[-1] == 0 and close[-1] > average[-1]:
+        events.append(dates[-1], "BUY created", close[-1])
+    elif n and position[-1] != 0 and close[-1] < average[-1]:
+        events.append(dates[-1], "SELL created", close[-1])
+
+    for fill in buys + sells:
+        fill["time"] = dates[fill.pop("bar")]
+
+    equity = pd.Series(cash_curve + position * close, index=df.index, name="Value")
+    return {
+        "buy": buys,
+        "sell": sells,
+        "trades": trades,
+        "events": events.to_frame(),
+        "equity": equity,
+        "final_value": float(equity.iloc[-1]) if n else cash,
+    }
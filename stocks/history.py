@@ -0,0 +1,32 @@
+import time
+
+import requests
+import yfinance as yf
+
+from common import upstream
+from common.fetch import make_session
+
+MAX_WORKERS = 16
+RETRIES = 3
+BACKOFF = 0.5  # seconds, doubled after every failed attempt
+
+
+# One keep-alive connection per worker:
+_session = make_session(MAX_WORKERS)
+
+
+def load_history(symbol, start, end, session=None):
+    """Daily OHLCV history of one symbol, retried with exponential back-off."""
+    delay = BACKOFF
+    for attempt in range(RETRIES):
+        try:
+            ticker = yf.Ticker(symbol, session=session or _session)
+            # pylint: disable=protected-access
+            ticker._base_url = upstream.url(ticker._base_url)
+            return ticker.history(start=start, end=end)
+        except (requests.RequestException, ValueError, KeyError):
+            if attempt == RETRIES - 1:
+                raise
+            time.sleep(delay)
+            delay *= 2
+    return None
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from common.lru import LRU
+from stocks.backtest import sma
+
+# Every period the chart sliders allow:
+PERIODS = range(1, 31)
+# Tickers and ranges kept in memory, least recently used evicted first:
+MAX_ENTRIES = 64
+
+_entries = LRU(MAX_ENTRIES)
+
+
+def _sma_rows(close, periods, history):
+    """SMA rows of `close` for each period, given the `history` closes preceding it."""
+    values = np.concatenate([history, close])
+    return np.column_stack([sma(values, p)[len(history) :] for p in periods])
+
+
+def _ema_rows(close, periods, last):
+    """Recursive EMA rows continuing from the `last` row, or seeded with the first close."""
+    alpha = 2 / (np.array(periods) + 1.0)
+    rows = np.empty((len(close), len(alpha)))
+    for i, value in enumerate(close):
+        last = value if last is None else alpha * value + (1 - alpha) * last
+        rows[i] = last
+    return rows
+
+
+def _compute(close, periods):
+    ema = np.column_stack(
+        [pd.Series(close).ewm(span=p, adjust=False).mean().to_numpy() for p in periods]
+    )
+    return {"close": close, "sma": _sma_rows(close, periods, close[:0]), "ema": ema}
+
+
+def _extend(entry, close, periods):
+    n = len(entry["close"])
+    history = entry["close"][max(0, n - max(periods) + 1) :]
+    return {
+        "close": close,
+        "sma": np.vstack([entry["sma"], _sma_rows(close[n:], periods, history)]),
+        "ema": np.vstack(
+            [entry["ema"], _ema_rows(close[n:], periods, entry["ema"][-1])]
+        ),
+    }
+
+
+def moving_averages(symbol, df, periods=PERIODS):
+    """SMA and EMA of df["Close"] for every period, as two frames with one column per period.
+
+    Computed once per ticker and first bar. Later calls with more bars only
+    compute the appended rows, and calls with fewer bars slice the cached ones.
+    Values match cufflinks' `add_sma` and `add_ema`: NaN until `period` bars.
+    """
+    close = df["Close"].to_numpy(dtype=float)
+    if not len(close):
+        empty = pd.DataFrame(index=df.index, columns=list(periods), dtype=float)
+        return empty, empty.copy()
+
+    key = (symbol, df.index[0], tuple(periods))
+    entry = _entries.get(key)
+    cached = 0 if entry is None else len(entry["close"])
+    if entry is not None and np.array_equal(
+        entry["close"][: len(close)], close[:cached]
+    ):
+        if cached < len(close):
+            entry = _extend(entry, close, periods)
+    else:
+        # New ticker or range, or a revised bar: start over.
+        entry = _compute(close, periods)
+    _entries.put(key, entry)
+
+    n = len(close)
+    ema = entry["ema"][:n].copy()
+    for j, p in enumerate(periods):
+        ema[: p - 1, j] = np.nan
+    return (
+        pd.DataFrame(entry["sma"][:n], index=df.index, columns=list(periods)),
+        pd.DataFrame(ema, index=df.index, columns=list(periods)),
+    )
@@ -0,0 +1,189 @@
+import fcntl
+import json
+import os
+import re
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pandas as pd
+import requests
+
+from common import datasets
+from common.diskcache import CACHE_DIR
+from common.timing import cache_event, span
+from stocks.history import MAX_WORKERS, load_history
+
+STORE_DIR = os.path.join(CACHE_DIR, "ohlcv")
+# Longest date range that can have no trading day (a weekend with holidays), in days:
+MAX_EMPTY_GAP = 4
+
+# Ticker symbols as Yahoo! Finance writes them (BRK-B, ^GSPC, EURUSD=X); nothing else reaches the file system:
+SYMBOL_PATTERN = re.compile(r"^[A-Z0-9.\-^=]{1,15}$")
+
+# Symbols share a fixed set of locks, so arbitrary input never grows it:
+_locks = [threading.Lock() for _ in range(64)]
+
+
+def _lock(symbol):
+    return _locks[zlib.crc32(symbol.encode()) % len(_locks)]
+
+
+def _path(symbol):
+    return os.path.join(STORE_DIR, f"{symbol}.arrow")
+
+
+def _lock_file(symbol):
+    """Open lock file of a symbol; flock it to update the symbol across processes."""
+    os.makedirs(STORE_DIR, exist_ok=True)
+    return open(os.path.join(STORE_DIR, f"{symbol}.lock"), "w")
+
+
+def valid_symbol(symbol):
+    return SYMBOL_PATTERN.match(symbol) is not None and symbol not in (".", "..")
+
+
+def _read(symbol):
+    """Stored frame of a symbol and the [start, end) date ranges it covers."""
+    try:
+        df = datasets.read(_path(symbol))
+        coverage = json.loads(datasets.metadata(_path(symbol))["coverage"])
+    except (OSError, KeyError, ValueError):
+        return None, []
+    ranges = [(date.fromisoformat(s), date.fromisoformat(e)) for s, e in coverage]
+    return df, ranges
+
+
+def _write(symbol, df, ranges):
+    coverage = json.dumps([(s.isoformat(), e.isoformat()) for s, e in ranges])
+    # Data and coverage live in one file, so replacing it keeps them consistent:
+    datasets.write(_path(symbol), df, metadata={"coverage": coverage})
+
+
+def missing_ranges(ranges, start, end):
+    """Parts of [start, end) not covered by the sorted, disjoint `ranges`."""
+    gaps = []
+    for covered_start, covered_end in ranges:
+        if covered_end <= start:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > start:
+            gaps.append((start, covered_start))
+        start = max(start, covered_end)
+    if start < end:
+        gaps.append((start, end))
+    return gaps
+
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _naive(df):
+    if getattr(df.index, "tz", None) is not None:
+        df = df.tz_localize(None)
+    return df
+
+
+def _empty():
+    return pd.DataFrame(
+        columns=["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"],
+        index=pd.DatetimeIndex([], name="Date"),
+        dtype=float,
+    )
+
+
+def _update(symbol, df, ranges, gaps):
+    if not gaps:
+        return df
+    with span("fetch"):
+        fetched = [_naive(load_history(symbol, s, e)) for s, e in gaps]
+    # Today's bar is still moving, so never record it as covered. Nor a
+    # gap that came back empty, unless it is short enough to only hold
+    # a weekend or holidays: Yahoo! also answers errors with no bars.
+    today = date.today()
+    covered = [
+        (s, min(e, today))
+        for (s, e), bars in zip(gaps, fetched)
+        if not bars.empty or (e - s).days <= MAX_EMPTY_GAP
+    ]
+    frames = [f for f in [df, *fetched] if f is not None and not f.empty]
+    if not frames:
+        return df
+    df = pd.concat(frames).sort_index()
+    df = df[~df.index.duplicated(keep="last")]
+    ranges = merge_ranges(ranges + covered)
+    ranges = [(s, e) for s, e in ranges if s < e]
+    _write(symbol, df, ranges)
+    return datasets.read(_path(symbol))
+
+
+def get_history(symbol, start, end):
+    """Daily OHLCV of `symbol` in [start, end), downloading only the missing dates.
+
+    Raises ValueError for anything that is not a ticker symbol.
+    """
+    if not valid_symbol(symbol):
+        raise ValueError(f"invalid ticker symbol: {symbol!r}")
+    df, ranges = _read(symbol)
+    gaps = missing_ranges(ranges, start, end)
+    if gaps:
+        # Other threads, and other processes sharing the store, may be updating
+        # the symbol: wait for them, then download what is still missing.
+        with _lock(symbol), _lock_file(symbol) as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            df, ranges = _read(symbol)
+            gaps = missing_ranges(ranges, start, end)
+            df = _update(symbol, df, ranges, gaps)
+    cache_event("stocks.store.get_history", "miss" if gaps else "hit")
+
+    if df is None:
+        return _empty()
+    # The index is sorted, so the range is a slice: a read-only view, not a copy.
+    first, last = df.index.searchsorted([pd.Timestamp(start), pd.Timestamp(end)])
+    return df.iloc[first:last]
+
+
+def get_histories(symbols, start, end, layout=None, max_workers=MAX_WORKERS):
+    """Stored histories of many symbols, fetching their missing dates concurrently.
+
+    Returns a dict of frames by symbol; with `layout="wide"` one frame aligned
+    on dates with (symbol, field) columns, and with `layout="long"` one frame
+    with a "Symbol" column, sorted by date. Symbols that keep failing or have
+    no data in the range are left out.
+    """
+    if layout not in (None, "wide", "long"):
+        raise ValueError(f"unknown layout: {layout!r}")
+
+    def fetch(symbol):
+        try:
+            return symbol, get_history(symbol, start, end)
+        except (requests.RequestException, ValueError, KeyError):
+            return symbol, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        frames = {
+            symbol: df
+            for symbol, df in pool.map(fetch, dict.fromkeys(symbols))
+            if df is not None and not df.empty
+        }
+
+    if layout is None:
+        return frames
+    if not frames:
+        return pd.DataFrame()
+    if layout == "wide":
+        return pd.concat(frames, axis=1).sort_index()
+    return (
+        pd.concat(frames, names=["Symbol"])
+        .reset_index(level="Symbol")
+        .sort_index(kind="mergesort")
+    )
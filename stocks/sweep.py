@@ -0,0 +1,123 @@
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from stocks.backtest import performance, run_sma_backtest
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+# Worker processes shared by every sweep, however many jobs run one:
+MAX_PROCESSES = int(
+    os.environ.get("STREAMLIT_DEMOS_SWEEP_PROCESSES", str(os.cpu_count() or 1))
+)
+# Parameter combinations sent to a worker at once:
+CHUNKS = 64
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Price frame a worker process last attached, reused by the next chunks of its sweep:
+_worker_shm = None
+_worker_df = None
+
+
+def _get_pool():
+    global _pool  # pylint: disable=global-statement
+    with _pool_lock:
+        if _pool is None:
+            # Forking a process with the server's threads running can copy locks
+            # they hold, so workers start from a clean forkserver instead:
+            _pool = ProcessPoolExecutor(
+                max_workers=MAX_PROCESSES,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        return _pool
+
+
+def _reset_pool(pool):
+    global _pool  # pylint: disable=global-statement
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def _attach(shm_name, shape, index):
+    global _worker_df, _worker_shm  # pylint: disable=global-statement
+    if _worker_shm is not None and _worker_shm.name == shm_name:
+        return _worker_df
+    if _worker_shm is not None:
+        _worker_df = None
+        _worker_shm.close()
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    values = np.ndarray(shape, dtype=np.float64, buffer=_worker_shm.buf)
+    _worker_df = pd.DataFrame(values, index=index, columns=COLUMNS, copy=False)
+    return _worker_df
+
+
+def _run(shm_name, shape, index, grid):
+    df = _attach(shm_name, shape, index)
+    rows = []
+    for ma_period, cash, commission in grid:
+        result = run_sma_backtest(
+            df, ma_period=ma_period, cash=cash, commission=commission
+        )
+        sharpe, max_drawdown = performance(result["equity"])
+        rows.append(
+            {
+                "ma_period": ma_period,
+                "cash": cash,
+                "commission": commission,
+                "final_value": result["final_value"],
+                "sharpe": sharpe,
+                "max_drawdown": max_drawdown,
+                "trades": len(result["trades"]),
+            }
+        )
+    return rows
+
+
+def sweep(df, ma_periods, cashes=(1000.0,), commissions=(0.0,), progress=None):
+    """Run the SMA backtest for every parameter combination on the shared process pool.
+
+    The OHLCV values are copied once into shared memory, so workers read the
+    same buffer instead of receiving a pickled frame with every task. All
+    sweeps share MAX_PROCESSES worker processes. `progress` is called with the
+    fraction of combinations done; an exception it raises cancels the
+    remaining ones.
+    """
+    pool = _get_pool()
+    values = df[COLUMNS].to_numpy(dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    futures = []
+    try:
+        np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[:] = values
+        grid = list(itertools.product(ma_periods, cashes, commissions))
+        size = max(1, -(-len(grid) // CHUNKS))
+        futures = [
+            pool.submit(_run, shm.name, values.shape, df.index, grid[i : i + size])
+            for i in range(0, len(grid), size)
+        ]
+        rows, done = [], 0
+        for future in futures:
+            rows += future.result()
+            done += 1
+            if progress:
+                progress(done / len(futures))
+    except BrokenProcessPool:
+        # A worker died; the next sweep starts a new pool.
+        _reset_pool(pool)
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+        # Chunks already running still read the buffer:
+        wait(futures)
+        shm.close()
+        shm.unlink()
+    return pd.DataFrame(rows)
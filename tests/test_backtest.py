@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocks.app import run_cerebro_backtest
+from stocks.backtest import run_sma_backtest
+
+
+def ohlcv(seed, bars=250):
+    """Random daily bars around 100 USD."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    open_ = close * (1 + rng.normal(0, 0.01, bars))
+    return pd.DataFrame(
+        {
+            "Open": open_,
+            "High": np.maximum(open_, close) * 1.01,
+            "Low": np.minimum(open_, close) * 0.99,
+            "Close": close,
+            "Volume": rng.integers(1_000, 10_000, bars).astype(float),
+        },
+        index=pd.bdate_range("2020-01-01", periods=bars, name="Date"),
+    )
+
+
+def fills(result, side):
+    return [
+        (f["time"], pytest.approx(f["price"]), pytest.approx(f["commission"]))
+        for f in result[side]
+    ]
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize(
+    "ma_period, cash, commission",
+    [
+        (20, 1000.0, 0.0),
+        (10, 1000.0, 0.002),
+        # Barely enough for one share, so some buys are rejected:
+        (15, 105.0, 0.0),
+        (5, 101.0, 0.001),
+    ],
+)
+def test_vectorized_engine_matches_backtrader(seed, ma_period, cash, commission):
+    df = ohlcv(seed)
+    vectorized = run_sma_backtest(df, ma_period, cash, commission)
+    reference = run_cerebro_backtest(df, ma_period, cash, commission)
+
+    assert fills(vectorized, "buy") == fills(reference, "buy")
+    assert fills(vectorized, "sell") == fills(reference, "sell")
+    assert [(t["opened"], t["closed"]) for t in vectorized["trades"]] == [
+        (t["opened"], t["closed"]) for t in reference["trades"]
+    ]
+    assert [t["pnlcomm"] for t in vectorized["trades"]] == pytest.approx(
+        [t["pnlcomm"] for t in reference["trades"]]
+    )
+    assert vectorized["final_value"] == pytest.approx(reference["final_value"])
+    assert vectorized["equity"].to_numpy() == pytest.approx(
+        reference["equity"].to_numpy()
+    )
+    assert list(vectorized["events"]["event"]) == list(reference["events"]["event"])
+
+
+def test_cash_limited_run_rejects_orders():
+    result = run_sma_backtest(ohlcv(0), 15, 105.0)
+    assert (result["events"]["event"] == "Order failed").any()
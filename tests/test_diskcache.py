@@ -0,0 +1,183 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from common import diskcache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    """Empty cache in a temporary directory, with a settable clock and recorded events."""
+    clock = Clock()
+    events = []
+    monkeypatch.setattr(diskcache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(diskcache, "_memory", {})
+    monkeypatch.setattr(diskcache, "time", clock)
+    monkeypatch.setattr(
+        diskcache, "cache_event", lambda loader, result: events.append(result)
+    )
+    return clock, events
+
+
+def counting_loader(ttl, delay=0.0):
+    calls = []
+
+    @diskcache.disk_cache(ttl)
+    def load(n):
+        calls.append(n)
+        time.sleep(delay)
+        return pd.DataFrame({"n": [n] * 3, "call": [len(calls)] * 3})
+
+    return load, calls
+
+
+def wait_for_refreshes():
+    for thread in threading.enumerate():
+        if thread.name.startswith("refresh-"):
+            thread.join()
+
+
+def test_miss_then_hit(cache):
+    _, events = cache
+    load, calls = counting_loader(ttl=60)
+
+    first = load(1)
+    second = load(1)
+
+    assert calls == [1]
+    assert events == ["miss", "hit"]
+    assert second["n"].tolist() == [1, 1, 1]
+    assert first.equals(second)
+
+
+def test_arguments_are_separate_entries(cache):
+    _, events = cache
+    load, calls = counting_loader(ttl=60)
+
+    load(1)
+    load(2)
+
+    assert calls == [1, 2]
+    assert events == ["miss", "miss"]
+
+
+def test_hit_from_disk_in_a_new_process(cache, monkeypatch):
+    _, events = cache
+    load, calls = counting_loader(ttl=60)
+    load(1)
+    # A new process has nothing in memory but shares the files:
+    monkeypatch.setattr(diskcache, "_memory", {})
+
+    assert load(1)["n"].tolist() == [1, 1, 1]
+    assert calls == [1]
+    assert events == ["miss", "hit"]
+
+
+def test_stale_entry_is_served_while_refreshed_in_background(cache):
+    clock, events = cache
+    load, calls = counting_loader(ttl=60)
+    load(1)
+
+    clock.now += 61
+    stale = load(1)
+    wait_for_refreshes()
+
+    assert stale["call"].tolist() == [1, 1, 1]
+    assert calls == [1, 1]
+    assert events == ["miss", "stale"]
+    assert load(1)["call"].tolist() == [2, 2, 2]
+    assert events[-1] == "hit"
+
+
+def test_entry_within_ttl_is_not_refreshed(cache):
+    clock, events = cache
+    load, calls = counting_loader(ttl=60)
+    load(1)
+
+    clock.now += 59
+    load(1)
+    wait_for_refreshes()
+
+    assert calls == [1]
+    assert events == ["miss", "hit"]
+
+
+def test_explicit_refresh_reloads(cache):
+    _, events = cache
+    load, calls = counting_loader(ttl=60)
+    load(1)
+
+    assert load.refresh(1)["call"].tolist() == [2, 2, 2]
+    assert load(1)["call"].tolist() == [2, 2, 2]
+    assert calls == [1, 1]
+    assert events == ["miss", "hit"]
+
+
+def test_concurrent_misses_share_one_load(cache):
+    load, calls = counting_loader(ttl=60, delay=0.2)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(load(1))) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert len(results) == 8
+    assert all(df["call"].tolist() == [1, 1, 1] for df in results)
+
+
+def test_refreshes_during_a_miss_share_its_load(cache):
+    load, calls = counting_loader(ttl=60, delay=0.2)
+    threads = [threading.Thread(target=load, args=(1,))] + [
+        threading.Thread(target=load.refresh, args=(1,)) for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+
+
+def test_failed_load_is_raised_to_every_caller_and_not_cached(cache):
+    attempts = []
+
+    @diskcache.disk_cache(60)
+    def load():
+        attempts.append(1)
+        time.sleep(0.2)
+        raise ValueError("upstream down")
+
+    errors = []
+
+    def call():
+        try:
+            load()
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(attempts) == 1
+    assert len(errors) == 4
+    with pytest.raises(ValueError):
+        load()
+    assert len(attempts) == 2
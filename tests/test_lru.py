@@ -0,0 +1,64 @@
+from common.lru import LRU
+
+
+def test_evicts_least_recently_used_entries():
+    cache = LRU(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_put_replaces_and_returns_the_value():
+    cache = LRU(2)
+    assert cache.put("a", 1) == 1
+    assert cache.put("a", 2) == 2
+
+    assert cache.get("a") == 2
+    assert len(cache) == 1
+
+
+def test_bounds_bytes():
+    cache = LRU(max_bytes=10)
+    cache.put("a", b"x" * 4)
+    cache.put("b", b"x" * 4)
+    cache.put("c", b"x" * 4)
+
+    assert cache.get("a") is None
+    assert cache.nbytes == 8
+    cache.put("b", b"x")
+    assert cache.nbytes == 5
+
+
+def test_does_not_keep_a_value_larger_than_the_byte_bound():
+    cache = LRU(max_bytes=10)
+    cache.put("a", b"x" * 4)
+
+    assert cache.put("b", b"x" * 11) == b"x" * 11
+    assert cache.get("b") is None
+    assert cache.get("a") == b"x" * 4
+
+
+def test_never_evicts_pinned_entries():
+    cache = LRU(2, evictable=lambda value: value["done"])
+    running = cache.put("a", {"done": False})
+    cache.put("b", {"done": True})
+    cache.put("c", {"done": False})
+    cache.put("d", {"done": False})
+
+    assert cache.get("a") is running
+    assert cache.get("b") is None
+    assert len(cache) == 3
+
+
+def test_clear():
+    cache = LRU(max_bytes=10)
+    cache.put("a", b"xx")
+    cache.clear()
+
+    assert cache.get("a") is None
+    assert (len(cache), cache.nbytes) == (0, 0)
@@ -0,0 +1,156 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocks import store
+
+
+def bars(start, end):
+    """Business-day bars in [start, end), as Yahoo! Finance answers them."""
+    index = pd.bdate_range(start, end, closed="left", name="Date")
+    close = np.arange(len(index), dtype=float) + 100
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close + 1,
+            "Low": close - 1,
+            "Close": close,
+            "Volume": 1000.0,
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        },
+        index=index,
+    )
+
+
+@pytest.fixture
+def fetches(monkeypatch, tmp_path):
+    """Empty store in a temporary directory; lists the (symbol, start, end) downloaded."""
+    calls = []
+
+    def load_history(symbol, start, end):
+        calls.append((symbol, start, end))
+        if symbol == "FAIL":
+            raise ValueError("no data")
+        return bars(start, end)
+
+    monkeypatch.setattr(store, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(store, "load_history", load_history)
+    return calls
+
+
+def test_get_histories_returns_frames_by_symbol(fetches):
+    frames = store.get_histories(
+        ["AAA", "BBB", "FAIL"], date(2021, 1, 4), date(2021, 1, 9)
+    )
+
+    assert sorted(frames) == ["AAA", "BBB"]
+    assert len(frames["AAA"]) == 5
+
+
+def test_get_histories_wide_layout_aligns_dates(fetches):
+    wide = store.get_histories(
+        ["AAA", "BBB", "FAIL"], date(2021, 1, 4), date(2021, 1, 9), layout="wide"
+    )
+
+    assert list(wide.columns.get_level_values(0).unique()) == ["AAA", "BBB"]
+    assert wide.index.is_monotonic_increasing
+    assert len(wide) == 5
+    assert wide[("BBB", "Close")].tolist() == [100.0, 101.0, 102.0, 103.0, 104.0]
+
+
+def test_get_histories_long_layout_has_a_symbol_column(fetches):
+    long = store.get_histories(
+        ["AAA", "BBB"], date(2021, 1, 4), date(2021, 1, 9), layout="long"
+    )
+
+    assert len(long) == 10
+    assert long.index.is_monotonic_increasing
+    assert long.groupby("Symbol").size().to_dict() == {"AAA": 5, "BBB": 5}
+
+
+def test_get_histories_without_data_is_an_empty_frame(fetches):
+    assert store.get_histories(
+        ["FAIL"], date(2021, 1, 4), date(2021, 1, 9), layout="wide"
+    ).empty
+
+
+def test_get_histories_rejects_unknown_layouts(fetches):
+    with pytest.raises(ValueError):
+        store.get_histories(["AAA"], date(2021, 1, 4), date(2021, 1, 9), layout="x")
+
+
+def d(day):
+    return date(2021, 1, day)
+
+
+@pytest.mark.parametrize(
+    "ranges, start, end, gaps",
+    [
+        ([], d(4), d(9), [(d(4), d(9))]),
+        ([(d(4), d(9))], d(4), d(9), []),
+        ([(d(1), d(20))], d(4), d(9), []),
+        ([(d(4), d(9))], d(1), d(20), [(d(1), d(4)), (d(9), d(20))]),
+        ([(d(1), d(5))], d(4), d(9), [(d(5), d(9))]),
+        ([(d(6), d(12))], d(4), d(9), [(d(4), d(6))]),
+        ([(d(1), d(4))], d(4), d(9), [(d(4), d(9))]),
+        ([(d(9), d(12))], d(4), d(9), [(d(4), d(9))]),
+        (
+            [(d(5), d(6)), (d(7), d(8))],
+            d(4),
+            d(9),
+            [(d(4), d(5)), (d(6), d(7)), (d(8), d(9))],
+        ),
+        ([(d(1), d(2)), (d(20), d(25))], d(4), d(9), [(d(4), d(9))]),
+        ([(d(4), d(9))], d(5), d(5), []),
+    ],
+)
+def test_missing_ranges(ranges, start, end, gaps):
+    assert store.missing_ranges(ranges, start, end) == gaps
+
+
+@pytest.mark.parametrize(
+    "ranges, merged",
+    [
+        ([], []),
+        ([(d(4), d(9))], [(d(4), d(9))]),
+        ([(d(10), d(12)), (d(4), d(9))], [(d(4), d(9)), (d(10), d(12))]),
+        ([(d(4), d(9)), (d(9), d(12))], [(d(4), d(12))]),
+        ([(d(4), d(10)), (d(6), d(8))], [(d(4), d(10))]),
+        ([(d(6), d(12)), (d(4), d(9)), (d(1), d(2))], [(d(1), d(2)), (d(4), d(12))]),
+        ([(d(4), d(4)), (d(4), d(9))], [(d(4), d(9))]),
+    ],
+)
+def test_merge_ranges(ranges, merged):
+    assert store.merge_ranges(ranges) == merged
+
+
+def test_get_history_downloads_only_missing_dates(fetches):
+    store.get_history("AAA", d(4), d(9))
+    store.get_history("AAA", d(4), d(9))
+    df = store.get_history("AAA", d(1), d(16))
+
+    assert fetches == [
+        ("AAA", d(4), d(9)),
+        ("AAA", d(1), d(4)),
+        ("AAA", d(9), d(16)),
+    ]
+    assert df.index.is_unique and df.index.is_monotonic_increasing
+    assert len(df) == len(pd.bdate_range(d(1), d(16), closed="left"))
+
+
+def test_get_history_of_an_empty_range_is_an_empty_frame(fetches, monkeypatch):
+    monkeypatch.setattr(
+        store, "load_history", lambda symbol, start, end: bars(d(1), d(1))
+    )
+
+    assert store.get_history("AAA", d(2), d(4)).empty
+    assert store.get_history("AAA", d(2), d(4)).empty
+
+
+def test_get_history_rejects_paths(fetches):
+    with pytest.raises(ValueError):
+        store.get_history("../AAA", d(4), d(9))
+    assert fetches == []